@@ -0,0 +1,78 @@
+"""
+Benchmark repeated keyword searches with throwaway vs. shared HTTP clients.
+
+A local stand-in for a REST search API (returning a small UniProt-like TSV
+page) is started on 127.0.0.1, then the same number of sequential searches
+is sent with a new `httpx.AsyncClient` per call (the old pattern in
+api_tools.py) and with the per-host client from togo_mcp.clients.
+
+Usage:
+    uv run python benchmarks/http_clients.py [--requests 500]
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from togo_mcp.clients import close_clients, get_client
+
+TSV_PAGE = "Entry\tProtein names\tOrganism\n" + "".join(
+    f"P{i:05d}\tKinase {i}\tHomo sapiens (Human)\n" for i in range(20)
+)
+
+
+async def search(request):
+    return PlainTextResponse(TSV_PAGE, media_type="text/tab-separated-values")
+
+
+async def throwaway_search(url: str, query: str) -> str:
+    async with httpx.AsyncClient() as client:
+        response = await client.get(url, params={"query": query, "format": "tsv"}, timeout=30.0)
+    response.raise_for_status()
+    return response.text
+
+
+async def pooled_search(url: str, query: str) -> str:
+    response = await get_client(url).get(url, params={"query": query, "format": "tsv"}, timeout=30.0)
+    response.raise_for_status()
+    return response.text
+
+
+async def run(n_requests: int, port: int) -> None:
+    app = Starlette(routes=[Route("/uniprotkb/search", search)])
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    serve_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    url = f"http://127.0.0.1:{port}/uniprotkb/search"
+    try:
+        for name, search_fn in (("throwaway client", throwaway_search), ("shared client", pooled_search)):
+            await search_fn(url, "warmup")
+            start = time.perf_counter()
+            for i in range(n_requests):
+                await search_fn(url, f"kinase {i}")
+            elapsed = time.perf_counter() - start
+            print(f"{name:17s} {n_requests} searches in {elapsed:.3f} s ({elapsed / n_requests * 1e3:.2f} ms/search)")
+    finally:
+        await close_clients()
+        server.should_exit = True
+        await serve_task
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500, help="Number of sequential searches per client mode")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the local stand-in server")
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.port))
+
+
+if __name__ == "__main__":
+    main()
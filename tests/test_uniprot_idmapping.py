@@ -0,0 +1,110 @@
+"""
+map_uniprot_ids / get_uniprot_id_mapping against a local stand-in of the
+UniProt ID mapping REST API (run, status, details and paged results).
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, RedirectResponse
+from starlette.routing import Route
+
+from togo_mcp import api_tools
+
+BASE = "http://testserver/idmapping"
+ROWS = [(f"G{i}", f"P{i:05d}") for i in range(7)]
+# The stand-in serves pages smaller than the client asks for, so paging relies on Link: rel=next.
+SERVER_PAGE_SIZE = 3
+
+
+def make_app(requests: list, page_size: int = SERVER_PAGE_SIZE) -> Starlette:
+    async def run(request: Request):
+        form = await request.form()
+        return JSONResponse({"jobId": "running-job" if "SLOW" in form["ids"] else "done-job"})
+
+    async def status(request: Request):
+        job_id = request.path_params["job_id"]
+        if job_id == "running-job":
+            return JSONResponse({"jobStatus": "RUNNING"})
+        return RedirectResponse(f"{BASE}/results/{job_id}", status_code=303)
+
+    async def details(request: Request):
+        job_id = request.path_params["job_id"]
+        return JSONResponse({"redirectURL": f"{BASE}/uniprotkb/results/{job_id}"})
+
+    async def results(request: Request):
+        requests.append(dict(request.query_params))
+        cursor = int(request.query_params.get("cursor", 0))
+        page = ROWS[cursor:cursor + page_size]
+        body = "From\tEntry\n" + "".join(f"{source}\t{target}\n" for source, target in page)
+        headers = {}
+        if cursor + page_size < len(ROWS):
+            next_url = f"{BASE}/uniprotkb/results/{request.path_params['job_id']}?cursor={cursor + page_size}"
+            headers["Link"] = f'<{next_url}>; rel="next"'
+        return PlainTextResponse(body, headers=headers)
+
+    return Starlette(routes=[
+        Route("/idmapping/run", run, methods=["POST"]),
+        Route("/idmapping/status/{job_id}", status),
+        Route("/idmapping/details/{job_id}", details),
+        Route("/idmapping/uniprotkb/results/{job_id}", results),
+    ])
+
+
+def serve(monkeypatch, page_size: int = SERVER_PAGE_SIZE) -> list:
+    requests = []
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=make_app(requests, page_size)))
+    monkeypatch.setattr(api_tools, "IDMAPPING_URL", BASE)
+    monkeypatch.setattr(api_tools, "get_client", lambda url: client)
+    api_tools._idmapping_jobs.clear()
+    return requests
+
+
+@pytest.fixture
+def result_requests(monkeypatch):
+    return serve(monkeypatch)
+
+
+def test_running_job_returns_handle(result_requests):
+    result = asyncio.run(api_tools.map_uniprot_ids.fn("SLOW1,SLOW2", wait=0))
+    assert result["job_id"] == "running-job"
+    assert result["status"] == "RUNNING"
+    assert "from" not in result
+    assert result_requests == []
+
+
+def test_finished_job_follows_next_cursors(result_requests):
+    ids = ",".join(source for source, _ in ROWS) + ",UNKNOWN"
+    result = asyncio.run(api_tools.map_uniprot_ids.fn(ids, wait=0))
+    assert result["job_id"] == "done-job"
+    assert result["status"] == "FINISHED"
+    assert list(zip(result["from"], result["to"])) == ROWS
+    assert result["unmapped"] == ["UNKNOWN"]
+    # First page with the client's parameters, then the two Link: rel=next cursors
+    assert result_requests[0]["format"] == "tsv"
+    assert [r.get("cursor") for r in result_requests] == [None, "3", "6"]
+
+
+def test_offset_window_across_page_boundary(result_requests):
+    asyncio.run(api_tools.map_uniprot_ids.fn("G0,G1", wait=0))
+    result_requests.clear()
+    result = asyncio.run(api_tools.get_uniprot_id_mapping.fn("done-job", offset=2, limit=3))
+    assert list(zip(result["from"], result["to"])) == ROWS[2:5]
+    assert "offset=5" in result["message"]
+    assert "unmapped" not in result
+    # Rows 2..4 span the first two pages; the third page is never requested
+    assert [r.get("cursor") for r in result_requests] == [None, "3"]
+
+
+def test_limit_within_single_page(monkeypatch):
+    result_requests = serve(monkeypatch, page_size=len(ROWS))
+    ids = ",".join(source for source, _ in ROWS)
+    result = asyncio.run(api_tools.map_uniprot_ids.fn(ids, wait=0, limit=3))
+    assert list(zip(result["from"], result["to"])) == ROWS[:3]
+    # Rows past the window on the only page still mean more results, not unmapped IDs
+    assert "offset=3" in result["message"]
+    assert "unmapped" not in result
+    assert [r.get("cursor") for r in result_requests] == [None]
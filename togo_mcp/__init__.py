@@ -1,4 +1,4 @@
 from .server import *
 from .rdf_portal import *
 from .api_tools import *
-from .togoid import convertId, countId, getAllDataset, getDataset, getAllRelation, getRelation, getDescription
+from .togoid import convertId, getConvertResult, countId, planRoute, detectDataset, getAllDataset, getDataset, getAllRelation, getRelation, getDescription
@@ -1,70 +1,644 @@
+import asyncio
+import csv
+import io
+import pickle
+import time
+import uuid
+from itertools import islice
 import httpx
-from typing import List, Dict, Annotated, Any, Optional
+from typing import List, Dict, Annotated, Any, Optional, Tuple
 from pydantic import Field
 import json
 import re
 
 from .server import *
+from .clients import get_client
+from .cache import TTLCache
+from .mesh_index import MeshIndex
+from .rhea_index import RheaIndex
+
+######################################
+#####　Response cache for REST tools ###
+######################################
+# Seconds a response stays fresh, per tool. These APIs change with database
+# releases, so a day (UniProt, PubChem, PDBj) to a week is safe.
+SEARCH_CACHE_TTL = {
+    "search_uniprot_entity": 86400.0,
+    "search_chembl_id_lookup": 7 * 86400.0,
+    "search_chembl_target": 7 * 86400.0,
+    "search_chembl_molecule": 7 * 86400.0,
+    "get_chembl_entity_by_id": 7 * 86400.0,
+    "get_chembl_entities": 7 * 86400.0,
+    "get_pubchem_compound_id": 86400.0,
+    "get_compound_attributes_from_pubchem": 86400.0,
+    "search_pdb_entity": 86400.0,
+    "get_pdb_entry_summaries": 7 * 86400.0,
+    "search_mesh_entity": 7 * 86400.0,
+    "search_reactome_entity": 7 * 86400.0,
+    "get_reactome_analysis": 86400.0,
+    "search_rhea_entity": 7 * 86400.0,
+}
+DEFAULT_SEARCH_CACHE_TTL = 86400.0
+
+# One size-capped LRU cache shared by all tools; hit ratios are recorded per tool.
+_search_cache = TTLCache("rest_search", maxsize=4096, ttl=2 * DEFAULT_SEARCH_CACHE_TTL)
+
+
+def _cache_key(tool: str, url: str, params: Optional[dict], headers: Optional[dict]) -> tuple:
+    """Build a cache key; parameter order and extra whitespace do not matter."""
+    def normalize(value):
+        return " ".join(value.split()) if isinstance(value, str) else str(value)
+    return (
+        tool,
+        url,
+        tuple(sorted((k, normalize(v)) for k, v in (params or {}).items())),
+        tuple(sorted((headers or {}).items())),
+    )
+
+
+def _freshness(tool: str, response: httpx.Response) -> Optional[float]:
+    """Seconds to treat `response` as fresh, or None if it must not be stored.
+
+    Honors Cache-Control: no-store (not stored), no-cache (stored only for
+    revalidation) and max-age (caps the tool's TTL).
+    """
+    ttl = SEARCH_CACHE_TTL.get(tool, DEFAULT_SEARCH_CACHE_TTL)
+    directives = [d.strip().lower() for d in response.headers.get("cache-control", "").split(",")]
+    if "no-store" in directives or "private" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+    for directive in directives:
+        if directive.startswith("max-age="):
+            try:
+                return min(ttl, float(directive[len("max-age="):]))
+            except ValueError:
+                pass
+    return ttl
+
+
+def _cached_response(url: str, entry: dict) -> httpx.Response:
+    return httpx.Response(
+        entry["status_code"],
+        content=entry["content"],
+        headers=entry["headers"],
+        request=httpx.Request("GET", url),
+    )
+
+
+async def _cached_get(
+    tool: str,
+    url: str,
+    params: Optional[dict] = None,
+    headers: Optional[dict] = None,
+    timeout: float = 30.0
+) -> httpx.Response:
+    """GET `url` through the shared client and the response cache.
+
+    Fresh entries are returned without a request. Stale entries that carry
+    an ETag or Last-Modified are revalidated with a conditional request.
+    """
+    key = _cache_key(tool, url, params, headers)
+    entry = _search_cache.peek(key)
+    now = time.monotonic()
+    if entry is not None and entry["fresh_until"] > now:
+        _search_cache.record(tool, True)
+        return _cached_response(url, entry)
+
+    request_headers = dict(headers or {})
+    if entry is not None:
+        if entry["etag"]:
+            request_headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            request_headers["If-Modified-Since"] = entry["last_modified"]
+    response = await get_client(url).get(url, params=params, headers=request_headers, timeout=timeout)
+
+    if response.status_code == 304 and entry is not None:
+        entry["fresh_until"] = now + (_freshness(tool, response) or 0.0)
+        _search_cache.record(tool, True)
+        return _cached_response(url, entry)
+
+    _search_cache.record(tool, False)
+    fresh = _freshness(tool, response)
+    etag = response.headers.get("etag")
+    last_modified = response.headers.get("last-modified")
+    if response.status_code == 200 and fresh is not None and (fresh > 0 or etag or last_modified):
+        _search_cache.set(key, {
+            "status_code": response.status_code,
+            "content": response.content,
+            "headers": {k: response.headers[k] for k in ("content-type", "link") if k in response.headers},
+            "etag": etag,
+            "last_modified": last_modified,
+            "fresh_until": now + fresh,
+        }, ttl=2 * SEARCH_CACHE_TTL.get(tool, DEFAULT_SEARCH_CACHE_TTL))
+    return response
 
 ######################################
 #####　Database-specific tools ########
 ######################################
 # DB: UniProt
+UNIPROT_SEARCH_URL = "https://rest.uniprot.org/uniprotkb/search"
+UNIPROT_STREAM_URL = "https://rest.uniprot.org/uniprotkb/stream"
+UNIPROT_DEFAULT_FIELDS = "accession,protein_name,organism_name"
+# Largest page size the search endpoint accepts; larger limits follow cursors.
+UNIPROT_PAGE_SIZE = 500
+UNIPROT_EXPORT_DIR = CACHE_DIR + "/uniprot_exports"
+UNIPROT_EXPORT_TTL = 86400
+UNIPROT_PREVIEW_ROWS = 20
+# Largest export written to disk; broader queries are rejected before streaming
+UNIPROT_EXPORT_MAX_ROWS = 1000000
+UNIPROT_EXPORT_MAX_BYTES = 1 << 30
+_EXPORT_HANDLE = re.compile(r"^[0-9a-f]{32}$")
+
+
+def _export_path(handle: str) -> str:
+    return os.path.join(UNIPROT_EXPORT_DIR, f"{handle}.tsv")
+
+
+def _prune_uniprot_exports() -> None:
+    """Delete export files older than UNIPROT_EXPORT_TTL."""
+    if not os.path.isdir(UNIPROT_EXPORT_DIR):
+        return
+    cutoff = time.time() - UNIPROT_EXPORT_TTL
+    for name in os.listdir(UNIPROT_EXPORT_DIR):
+        path = os.path.join(UNIPROT_EXPORT_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+async def _search_uniprot_pages(query: str, fields: str, limit: int) -> str:
+    """Follow `Link: rel=next` cursors until `limit` rows are collected.
+
+    Each page is parsed as it arrives and only the rows still needed are
+    kept, so memory is bounded by `limit`, not by the size of the result set.
+    """
+    lines: List[str] = []
+    rows = 0
+    url = UNIPROT_SEARCH_URL
+    params = {"query": query, "fields": fields, "format": "tsv", "size": min(limit, UNIPROT_PAGE_SIZE)}
+    while url and rows < limit:
+        response = await _cached_get("search_uniprot_entity", url, params=params)
+        response.raise_for_status()
+        page = iter(response.text.splitlines())
+        header = next(page, None)
+        if header is None:
+            break
+        if not lines:
+            lines.append(header)
+        for line in islice(page, limit - rows):
+            lines.append(line)
+            rows += 1
+        # The next-page URL already carries the query and the cursor
+        url = response.links.get("next", {}).get("url")
+        params = None
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+async def _uniprot_total(query: str) -> int:
+    """Return the number of entries matching `query` (the x-total-results header)."""
+    params = {"query": query, "fields": "accession", "format": "tsv", "size": 1}
+    response = await get_client(UNIPROT_SEARCH_URL).get(UNIPROT_SEARCH_URL, params=params, timeout=30.0)
+    response.raise_for_status()
+    return int(response.headers.get("x-total-results", 0))
+
+
+async def _export_uniprot(query: str, fields: str) -> str:
+    """Stream the complete result set to a TSV file and return a summary.
+
+    Lines are written to disk as they arrive from the `/stream` endpoint,
+    so memory stays constant however many rows match. Queries matching more
+    than UNIPROT_EXPORT_MAX_ROWS entries are rejected up front, and a file
+    growing past UNIPROT_EXPORT_MAX_BYTES is abandoned.
+    """
+    _prune_uniprot_exports()
+    os.makedirs(UNIPROT_EXPORT_DIR, exist_ok=True)
+    handle = uuid.uuid4().hex
+    path = _export_path(handle)
+    params = {"query": query, "fields": fields, "format": "tsv"}
+    preview: List[str] = []
+    rows = -1  # the first line is the header
+    size = 0
+    try:
+        total = await _uniprot_total(query)
+        if total > UNIPROT_EXPORT_MAX_ROWS:
+            raise ValueError(
+                f"The query matches {total} UniProt entries; exports are limited to {UNIPROT_EXPORT_MAX_ROWS}. "
+                "Narrow the query (e.g. add organism_id or reviewed:true)."
+            )
+        async with get_client(UNIPROT_STREAM_URL).stream("GET", UNIPROT_STREAM_URL, params=params, timeout=300.0) as response:
+            response.raise_for_status()
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                async for line in response.aiter_lines():
+                    line = line.rstrip("\r\n")
+                    if not line:
+                        continue
+                    size += f.write(line + "\n")
+                    if size > UNIPROT_EXPORT_MAX_BYTES:
+                        raise ValueError(
+                            f"The UniProt export exceeded {UNIPROT_EXPORT_MAX_BYTES >> 20} MiB; "
+                            "narrow the query or request fewer fields."
+                        )
+                    if rows < UNIPROT_PREVIEW_ROWS:
+                        preview.append(line)
+                    rows += 1
+        os.replace(path + ".tmp", path)
+    except httpx.HTTPError as e:
+        print(f"Error streaming UniProt results: {e}")
+        raise
+    finally:
+        # Left over only if the export failed or was cancelled
+        if os.path.exists(path + ".tmp"):
+            os.remove(path + ".tmp")
+    summary = (
+        f"# UniProt export {handle}: {max(rows, 0)} rows (fields: {fields}). "
+        f"Read further rows with read_uniprot_export(handle=\"{handle}\", offset, limit).\n"
+    )
+    return summary + "\n".join(preview) + "\n"
+
+
 @mcp.tool(enabled=True)
-async def search_uniprot_entity(query: str, limit: int = 20) -> str:
+async def search_uniprot_entity(query: str, limit: int = 20, fields: Optional[str] = None, export: bool = False) -> str:
     """
     Search for a UniProt entity ID by query.
 
     Args:
         query (str): The query to search for. The query should be unambiguous enough to uniquely identify the entity.
-        limit (int): The maximum number of results to return. Default is 20.
+        limit (int): The maximum number of results to return. Default is 20. Limits above 500 are fetched page by page.
+        fields (str, optional): Comma-separated UniProtKB return fields (e.g. "accession,gene_names,length").
+            Default is "accession,protein_name,organism_name".
+        export (bool): If True, ignore `limit` and stream every matching entry to a server-side TSV file.
+            Returns the row count, a handle for `read_uniprot_export` and a preview of the first rows.
+            Queries matching more than 1,000,000 entries are rejected.
 
     Returns:
         str: The UniProt protein entity ID corresponding to the given query."
     """
     toolcall_log("search_uniprot_entity")
-    url = "https://rest.uniprot.org/uniprotkb/search"
-    params = {
-        "query": query,
-        "fields": "accession,protein_name,organism_name",
-        "format": "tsv",
-        "size": limit 
-    }
+    fields = fields or UNIPROT_DEFAULT_FIELDS
+    if export:
+        return await _export_uniprot(query, fields)
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params, timeout=30.0)
-        response.raise_for_status()
-        data = response.text
-        return data
+        return await _search_uniprot_pages(query, fields, limit)
     except httpx.HTTPError as e:
         print(f"Error querying UniProt: {e}")
         raise
 
+
+@mcp.tool(enabled=True)
+def read_uniprot_export(handle: str, offset: int = 0, limit: int = 1000) -> str:
+    """
+    Read rows from a UniProt export created by search_uniprot_entity(export=True).
+
+    Args:
+        handle (str): The export handle.
+        offset (int): Number of rows to skip. Default is 0.
+        limit (int): The maximum number of rows to return. Default is 1000.
+
+    Returns:
+        str: The TSV header followed by the requested rows.
+    """
+    toolcall_log("read_uniprot_export")
+    path = _export_path(handle)
+    if not _EXPORT_HANDLE.match(handle) or not os.path.exists(path):
+        raise ValueError(f"Unknown or expired UniProt export handle: {handle}")
+    with open(path, "r", encoding="utf-8") as f:
+        header = f.readline()
+        return header + "".join(islice(f, offset, offset + limit))
+
+# UniProt ID mapping jobs
+IDMAPPING_URL = "https://rest.uniprot.org/idmapping"
+IDMAPPING_MAX_IDS = 100000
+IDMAPPING_PAGE_SIZE = 500
+# Poll after 1 s, then back off by 1.5x up to 10 s between polls.
+IDMAPPING_POLL_INITIAL = 1.0
+IDMAPPING_POLL_MAX = 10.0
+IDMAPPING_POLL_FACTOR = 1.5
+
+# Submitted jobs (IDs and databases), kept as long as UniProt keeps results.
+_idmapping_jobs = TTLCache("uniprot_idmapping_jobs", maxsize=256, ttl=7 * 86400)
+
+
+async def _idmapping_status(job_id: str) -> str:
+    """Return "FINISHED" or "RUNNING" for a job; raise ValueError on job errors."""
+    url = f"{IDMAPPING_URL}/status/{job_id}"
+    response = await get_client(url).get(url, timeout=30.0, follow_redirects=False)
+    if response.status_code == 303:
+        return "FINISHED"
+    response.raise_for_status()
+    data = response.json()
+    status = data.get("jobStatus")
+    if status in ("NEW", "RUNNING"):
+        return "RUNNING"
+    if status == "FINISHED" or "results" in data or "failedIds" in data:
+        return "FINISHED"
+    errors = data.get("errors") or data.get("messages") or [status]
+    raise ValueError(f"UniProt ID mapping job {job_id} failed: {errors}")
+
+
+async def _idmapping_wait(job_id: str, wait: float) -> str:
+    """Poll a job with exponential backoff for at most `wait` seconds."""
+    deadline = time.monotonic() + wait
+    delay = IDMAPPING_POLL_INITIAL
+    while True:
+        status = await _idmapping_status(job_id)
+        remaining = deadline - time.monotonic()
+        if status == "FINISHED" or remaining <= 0:
+            return status
+        await asyncio.sleep(min(delay, remaining))
+        delay = min(delay * IDMAPPING_POLL_FACTOR, IDMAPPING_POLL_MAX)
+
+
+async def _idmapping_results(job_id: str, offset: int, limit: int) -> Dict[str, Any]:
+    """Read result pages of a finished job, keeping only rows offset..offset+limit.
+
+    Pages are requested as two-column TSV (From, To/Entry) and parsed one
+    at a time; paging stops as soon as `limit` rows are collected. The
+    result is complete only if every row of the job was read.
+    """
+    url = f"{IDMAPPING_URL}/details/{job_id}"
+    response = await get_client(url).get(url, timeout=30.0)
+    response.raise_for_status()
+    url = response.json()["redirectURL"]
+    params = {"format": "tsv", "size": IDMAPPING_PAGE_SIZE}
+    if "/uniprotkb/" in url:
+        params["fields"] = "accession"
+
+    sources: List[str] = []
+    targets: List[str] = []
+    seen = 0
+    complete = True
+    while url and complete:
+        response = await get_client(url).get(url, params=params, timeout=60.0)
+        response.raise_for_status()
+        for line in islice(response.text.splitlines(), 1, None):
+            fields = line.split("\t")
+            if len(fields) < 2:
+                continue
+            if seen >= offset + limit:
+                complete = False
+                break
+            if seen >= offset:
+                sources.append(fields[0])
+                targets.append(fields[1])
+            seen += 1
+        url = response.links.get("next", {}).get("url")
+        params = None
+        if url and seen >= offset + limit:
+            complete = False
+    return {"from": sources, "to": targets, "complete": complete}
+
+
+async def _idmapping_report(job_id: str, offset: int, limit: int) -> Dict[str, Any]:
+    result = await _idmapping_results(job_id, offset, limit)
+    output = {"job_id": job_id, "status": "FINISHED", "from": result["from"], "to": result["to"]}
+    job = _idmapping_jobs.get(job_id)
+    if not result["complete"]:
+        output["message"] = f"More results are available; call get_uniprot_id_mapping with offset={offset + limit}."
+    elif job is not None and offset == 0:
+        mapped = set(result["from"])
+        output["unmapped"] = [i for i in job["ids"] if i not in mapped]
+    return output
+
+
+@mcp.tool(enabled=True)
+async def map_uniprot_ids(
+    ids: str,
+    from_db: str = "Gene_Name",
+    to_db: str = "UniProtKB",
+    taxon_id: Optional[str] = None,
+    wait: float = 60.0,
+    limit: int = 10000,
+) -> Dict[str, Any]:
+    """
+    Convert many identifiers at once with a UniProt ID mapping job.
+
+    Use this instead of one search_uniprot_entity call per ID, e.g. to map
+    thousands of gene names or RefSeq IDs to UniProt accessions.
+
+    Args:
+        ids (str): Comma-separated identifiers (up to 100,000).
+        from_db (str): UniProt ID mapping source database, e.g. "Gene_Name", "RefSeq_Protein",
+            "GeneID", "Ensembl", "UniProtKB_AC-ID". Default is "Gene_Name".
+        to_db (str): Target database, e.g. "UniProtKB", "UniProtKB-Swiss-Prot", "PDB", "GeneID". Default is "UniProtKB".
+        taxon_id (str, optional): NCBI taxonomy ID restricting the mapping (recommended for gene names, e.g. "9606").
+        wait (float): Seconds to wait for the job before returning its job_id. Default is 60.
+            Use 0 to return the job_id immediately and collect results later with get_uniprot_id_mapping.
+        limit (int): The maximum number of mappings to return. Default is 10000.
+
+    Returns:
+        Dict[str, Any]: job_id and status. A finished job also returns "from" and "to"
+            (parallel lists, one row per mapping) and the submitted IDs that were not mapped.
+    """
+    toolcall_log("map_uniprot_ids")
+    id_list = list(dict.fromkeys(i.strip() for i in ids.split(",") if i.strip()))
+    if not id_list:
+        raise ValueError("No identifiers given.")
+    if len(id_list) > IDMAPPING_MAX_IDS:
+        raise ValueError(f"UniProt ID mapping accepts at most {IDMAPPING_MAX_IDS} IDs per job.")
+
+    data = {"ids": ",".join(id_list), "from": from_db, "to": to_db}
+    if taxon_id:
+        data["taxId"] = taxon_id
+    url = f"{IDMAPPING_URL}/run"
+    try:
+        response = await get_client(url).post(url, data=data, timeout=60.0)
+        response.raise_for_status()
+        job_id = response.json()["jobId"]
+        _idmapping_jobs.set(job_id, {"ids": id_list, "from": from_db, "to": to_db})
+        status = await _idmapping_wait(job_id, wait)
+        if status != "FINISHED":
+            return {
+                "job_id": job_id,
+                "status": status,
+                "message": "The job is still running; call get_uniprot_id_mapping(job_id) to collect the results.",
+            }
+        return await _idmapping_report(job_id, 0, limit)
+    except httpx.HTTPError as e:
+        print(f"Error running UniProt ID mapping: {e}")
+        raise
+
+
+@mcp.tool(enabled=True)
+async def get_uniprot_id_mapping(job_id: str, offset: int = 0, limit: int = 10000, wait: float = 0.0) -> Dict[str, Any]:
+    """
+    Get the status or results of a UniProt ID mapping job started by map_uniprot_ids.
+
+    Args:
+        job_id (str): The job ID returned by map_uniprot_ids.
+        offset (int): Number of mappings to skip. Default is 0.
+        limit (int): The maximum number of mappings to return. Default is 10000.
+        wait (float): Seconds to keep polling a running job before returning. Default is 0.
+
+    Returns:
+        Dict[str, Any]: job_id and status; "from" and "to" lists once the job has finished.
+    """
+    toolcall_log("get_uniprot_id_mapping")
+    try:
+        status = await _idmapping_wait(job_id, wait)
+        if status != "FINISHED":
+            return {"job_id": job_id, "status": status}
+        return await _idmapping_report(job_id, offset, limit)
+    except httpx.HTTPError as e:
+        print(f"Error reading UniProt ID mapping job {job_id}: {e}")
+        raise
+
 # DB: ChEMBL
-async def search_chembl_generic(entity_type: str, query: str, limit: int = 20) -> dict:
+CHEMBL_API = "https://www.ebi.ac.uk/chembl/api/data"
+# Largest page the ChEMBL API serves; bigger searches page concurrently.
+CHEMBL_PAGE_SIZE = 1000
+CHEMBL_MAX_CONCURRENCY = 4
+# IDs per `__in` filter; keeps request URLs well under server limits.
+CHEMBL_BATCH_SIZE = 50
+
+# ChEMBL entity type -> tool name used for cache statistics
+_CHEMBL_TOOL_NAMES = {"chembl_id_lookup": "search_chembl_id_lookup"}
+# Fields read by the search tools; everything else is left out with `only=`.
+CHEMBL_SEARCH_FIELDS = {
+    "chembl_id_lookup": "chembl_id,entity_type,score",
+    "target": "target_chembl_id,pref_name,organism,target_type,score",
+    "molecule": "molecule_chembl_id,pref_name,score",
+}
+# Entity type -> ID field used for `__in` batch lookups
+CHEMBL_ID_FIELDS = {
+    "activity": "activity_id",
+    "assay": "assay_chembl_id",
+    "cell_line": "cell_chembl_id",
+    "chembl_id_lookup": "chembl_id",
+    "document": "document_chembl_id",
+    "drug": "molecule_chembl_id",
+    "mechanism": "molecule_chembl_id",
+    "molecule": "molecule_chembl_id",
+    "target": "target_chembl_id",
+    "tissue": "tissue_chembl_id",
+}
+
+_chembl_semaphore = asyncio.Semaphore(CHEMBL_MAX_CONCURRENCY)
+
+
+async def _chembl_get(tool: str, url: str, params: dict) -> dict:
+    async with _chembl_semaphore:
+        response = await _cached_get(tool, url, params=params)
+    response.raise_for_status()
+    return response.json()
+
+
+def _chembl_items(page: dict) -> List[dict]:
+    """Return the record list of a ChEMBL page (its only key besides page_meta)."""
+    for key, value in page.items():
+        if key != "page_meta" and isinstance(value, list):
+            return value
+    return []
+
+
+async def _chembl_pages(tool: str, url: str, params: dict, limit: int) -> dict:
+    """Fetch up to `limit` records, paging concurrently past the first page.
+
+    The first page's page_meta gives the total count, from which the
+    offsets of the remaining pages are requested in parallel (bounded by
+    CHEMBL_MAX_CONCURRENCY). Records keep the API's order.
+    """
+    page_size = min(limit, CHEMBL_PAGE_SIZE)
+    first = await _chembl_get(tool, url, {**params, "limit": page_size, "offset": 0})
+    items = _chembl_items(first)
+    total = first.get("page_meta", {}).get("total_count", 0)
+    wanted = min(limit, total)
+    if first.get("page_meta", {}).get("next") and len(items) < wanted:
+        offsets = range(page_size, wanted, page_size)
+        pages = await asyncio.gather(*[
+            _chembl_get(tool, url, {**params, "limit": min(page_size, wanted - offset), "offset": offset})
+            for offset in offsets
+        ])
+        for page in pages:
+            items.extend(_chembl_items(page))
+    list_key = next((key for key, value in first.items() if key != "page_meta" and isinstance(value, list)), "results")
+    return {"page_meta": first.get("page_meta", {}), list_key: items[:limit]}
+
+
+async def search_chembl_generic(entity_type: str, query: str, limit: int = 20, only: Optional[str] = None) -> dict:
     """
     Search for ChEMBL ID by query.
 
     Args:
         entity_type (str): The type of entity to search for.
         query (str): The query string to search for.
-        limit (int): The maximum number of results to return.
+        limit (int): The maximum number of results to return. Limits above
+            1000 are fetched as concurrent pages.
+        only (str, optional): Comma-separated fields to return. Defaults to
+            the fields the search tools read for `entity_type`.
 
     Returns:
         A dictionary parsed from the JSON response.
     """
-    url = f"https://www.ebi.ac.uk/chembl/api/data/{entity_type}/search.json"
-    params = {"q": query, "limit": limit}
+    url = f"{CHEMBL_API}/{entity_type}/search.json"
+    params = {"q": query}
+    only = only or CHEMBL_SEARCH_FIELDS.get(entity_type)
+    if only:
+        params["only"] = only
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params, timeout=30.0)
-        response.raise_for_status()
-        return response.json()
+        return await _chembl_pages(_CHEMBL_TOOL_NAMES.get(entity_type, f"search_chembl_{entity_type}"), url, params, limit)
     except httpx.HTTPError as e:
         print(f"Error querying ChEMBL {entity_type}: {e}")
         raise
 
 
+@mcp.tool()
+async def get_chembl_entities(entity_type: str, chembl_ids: str, only: Optional[str] = None) -> dict:
+    """
+    Look up many ChEMBL records by ID in a few batched requests.
+
+    Args:
+        entity_type (str): One of "molecule", "target", "assay", "document", "cell_line",
+            "tissue", "drug", "mechanism", "activity" or "chembl_id_lookup".
+        chembl_ids (str): Comma-separated ChEMBL IDs (e.g. "CHEMBL25,CHEMBL1642"), any number.
+        only (str, optional): Comma-separated fields to return (e.g. "molecule_chembl_id,pref_name").
+            Default returns full records.
+
+    Returns:
+        dict: Dictionary containing:
+            - 'results' (list): Records found, in API order
+            - 'not_found' (list): Requested IDs with no record
+            - 'errors' (list, optional): Batches that failed
+    """
+    toolcall_log("get_chembl_entities")
+    id_field = CHEMBL_ID_FIELDS.get(entity_type)
+    if id_field is None:
+        raise ValueError(f"Unsupported entity type '{entity_type}'. Use one of: {', '.join(CHEMBL_ID_FIELDS)}")
+    ids = list(dict.fromkeys(i.strip() for i in chembl_ids.split(",") if i.strip()))
+    if only and id_field not in only.split(","):
+        only = f"{id_field},{only}"
+
+    url = f"{CHEMBL_API}/{entity_type}.json"
+    batches = [ids[i:i + CHEMBL_BATCH_SIZE] for i in range(0, len(ids), CHEMBL_BATCH_SIZE)]
+
+    async def fetch(batch: List[str]) -> dict:
+        params = {f"{id_field}__in": ",".join(batch)}
+        if only:
+            params["only"] = only
+        return await _chembl_pages("get_chembl_entities", url, params, limit=10 * CHEMBL_PAGE_SIZE)
+
+    pages = await asyncio.gather(*[fetch(batch) for batch in batches], return_exceptions=True)
+    results: List[dict] = []
+    errors = []
+    for batch, page in zip(batches, pages):
+        if isinstance(page, Exception):
+            errors.append({"ids": batch, "error": str(page)})
+            continue
+        results.extend(_chembl_items(page))
+
+    found = {str(record.get(id_field)) for record in results}
+    failed = {i for error in errors for i in error["ids"]}
+    output = {
+        "results": results,
+        "not_found": [i for i in ids if i not in found and i not in failed],
+    }
+    if errors:
+        output["errors"] = errors
+    return output
+
+
 @mcp.tool()
 async def search_chembl_id_lookup(
     query: Annotated[str, Field(description="The query string to search for.")],
@@ -260,10 +834,9 @@ async def get_chembl_entity_by_id(service: str, chembl_id: str) -> str:
 
     """
     toolcall_log("get_chembl_entity_by_id")
-    url = f"https://www.ebi.ac.uk/chembl/api/data/{service}/{chembl_id}.json"
+    url = f"{CHEMBL_API}/{service}/{chembl_id}.json"
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, timeout=30.0)
+        response = await _cached_get("get_chembl_entity_by_id", url)
         response.raise_for_status()
         return response.text
     except httpx.HTTPError as e:
@@ -285,8 +858,7 @@ async def get_pubchem_compound_id(compound_name: str) -> str:
     toolcall_log("get_pubchem_compound_id")
     url = f"https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/name/{compound_name}/cids/JSON"
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, timeout=30.0)
+        response = await _cached_get("get_pubchem_compound_id", url)
         response.raise_for_status()
         return response.text
     except httpx.HTTPError as e:
@@ -307,15 +879,198 @@ async def get_compound_attributes_from_pubchem(pubchem_compound_id: str) -> str:
     url = "https://togodx.dbcls.jp/human/sparqlist/api/metastanza_pubchem_compound"
     params = {"id": pubchem_compound_id}
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params, timeout=30.0)
+        response = await _cached_get("get_compound_attributes_from_pubchem", url, params=params)
         response.raise_for_status()
         return response.text
     except httpx.HTTPError as e:
         print(f"Error fetching PubChem compound attributes for {pubchem_compound_id}: {e}")
         raise
 
+# Batch PUG-REST access
+PUBCHEM_PUG_URL = "https://pubchem.ncbi.nlm.nih.gov/rest/pug"
+# CIDs per POST; PUG-REST accepts long lists in the request body.
+PUBCHEM_CID_BATCH_SIZE = 200
+PUBCHEM_MAX_CONCURRENCY = 5
+# PubChem asks for at most 5 requests per second.
+PUBCHEM_MIN_INTERVAL = 0.2
+PUBCHEM_DEFAULT_PROPERTIES = "MolecularFormula,MolecularWeight,SMILES,InChIKey,IUPACName,XLogP"
+
+
+class _PubChemThrottle:
+    """Limit concurrent PUG-REST requests, adapting to X-Throttling-Control.
+
+    PubChem reports its load as Green/Yellow/Red/Black per category in
+    every response. Green raises the concurrency limit by one (up to
+    `max_concurrency`), Yellow lowers it by one, and Red or Black drops it
+    to a single request and pauses new ones before continuing.
+    """
+
+    PAUSE = {"Red": 1.0, "Black": 10.0}
+
+    def __init__(self, max_concurrency: int, min_interval: float):
+        self.max_concurrency = max_concurrency
+        self.limit = max_concurrency
+        self.min_interval = min_interval
+        self._active = 0
+        self._next_slot = 0.0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._active < self.limit)
+            self._active += 1
+            # Reserve a start time, then wait for it outside the lock
+            start = max(time.monotonic(), self._next_slot)
+            self._next_slot = start + self.min_interval
+        delay = start - time.monotonic()
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                await self.release()
+                raise
+
+    async def release(self) -> None:
+        async with self._condition:
+            self._active -= 1
+            self._condition.notify_all()
+
+    async def update(self, header: str) -> None:
+        """Adjust the limit from an X-Throttling-Control header value."""
+        states = re.findall(r"\b(Green|Yellow|Red|Black)\b", header)
+        if not states:
+            return
+        async with self._condition:
+            if "Black" in states or "Red" in states:
+                worst = "Black" if "Black" in states else "Red"
+                self.limit = 1
+                self._next_slot = max(self._next_slot, time.monotonic() + self.PAUSE[worst])
+            elif "Yellow" in states:
+                self.limit = max(1, self.limit - 1)
+            else:
+                self.limit = min(self.max_concurrency, self.limit + 1)
+            # A raised limit may let waiting requests start
+            self._condition.notify_all()
+
+
+_pubchem_throttle = _PubChemThrottle(PUBCHEM_MAX_CONCURRENCY, PUBCHEM_MIN_INTERVAL)
+_pubchem_name_cache = TTLCache("pubchem_names", maxsize=8192, ttl=SEARCH_CACHE_TTL["get_pubchem_compound_id"])
+
+
+async def _pubchem_post(path: str, data: dict) -> httpx.Response:
+    """POST to PUG-REST under the shared adaptive throttle."""
+    url = f"{PUBCHEM_PUG_URL}/{path}"
+    await _pubchem_throttle.acquire()
+    try:
+        response = await get_client(url).post(url, data=data, timeout=60.0)
+    finally:
+        await _pubchem_throttle.release()
+    await _pubchem_throttle.update(response.headers.get("x-throttling-control", ""))
+    return response
+
+
+async def _pubchem_name_cids(name: str) -> List[int]:
+    cids = _pubchem_name_cache.get(name)
+    if cids is None:
+        response = await _pubchem_post("compound/name/cids/JSON", {"name": name})
+        if response.status_code == 404:
+            cids = []
+        else:
+            response.raise_for_status()
+            cids = response.json().get("IdentifierList", {}).get("CID", [])
+        _pubchem_name_cache.set(name, cids)
+    return cids
+
+
+@mcp.tool()
+async def get_pubchem_compound_ids(compound_names: List[str]) -> dict:
+    """
+    Resolve many compound names to PubChem Compound IDs in one call.
+
+    Names are resolved concurrently; the number of parallel requests follows
+    PubChem's own load reports, and recently resolved names are cached.
+
+    Args:
+        compound_names (List[str]): Compound names, e.g. ["resveratrol", "aspirin"]
+
+    Returns:
+        dict: 'results' mapping each name to its list of CIDs, 'not_found' with names
+            that have no CID, and 'errors' for names whose lookup failed.
+    """
+    toolcall_log("get_pubchem_compound_ids")
+    names = list(dict.fromkeys(n.strip() for n in compound_names if n.strip()))
+    outcomes = await asyncio.gather(*[_pubchem_name_cids(name) for name in names], return_exceptions=True)
+    output = {"results": {}, "not_found": []}
+    errors = {}
+    for name, outcome in zip(names, outcomes):
+        if isinstance(outcome, Exception):
+            errors[name] = str(outcome)
+        elif outcome:
+            output["results"][name] = outcome
+        else:
+            output["not_found"].append(name)
+    if errors:
+        output["errors"] = errors
+    return output
+
+
+@mcp.tool()
+async def get_pubchem_properties(cids: str, properties: str = PUBCHEM_DEFAULT_PROPERTIES, format: str = "json") -> dict:
+    """
+    Get a property table for many PubChem compounds with batched POST requests.
+
+    Args:
+        cids (str): Comma-separated PubChem Compound IDs, any number (e.g. "2244,445154").
+        properties (str): Comma-separated PUG-REST property names.
+            Default is "MolecularFormula,MolecularWeight,SMILES,InChIKey,IUPACName,XLogP".
+        format (str): "json" for a list of records, or "csv" for one CSV text block.
+
+    Returns:
+        dict: 'properties' (list of records, or CSV text with one header row) and
+            'errors' for batches that failed.
+    """
+    toolcall_log("get_pubchem_properties")
+    if format not in ("json", "csv"):
+        raise ValueError(f"Unsupported format '{format}'. Use 'json' or 'csv'.")
+    ids = list(dict.fromkeys(c.strip() for c in cids.split(",") if c.strip()))
+    batches = [ids[i:i + PUBCHEM_CID_BATCH_SIZE] for i in range(0, len(ids), PUBCHEM_CID_BATCH_SIZE)]
+    path = f"compound/cid/property/{properties.replace(' ', '')}/{format.upper()}"
+
+    async def fetch(batch: List[str]) -> httpx.Response:
+        response = await _pubchem_post(path, {"cid": ",".join(batch)})
+        response.raise_for_status()
+        return response
+
+    responses = await asyncio.gather(*[fetch(batch) for batch in batches], return_exceptions=True)
+    records: List[dict] = []
+    csv_lines: List[str] = []
+    errors = []
+    for batch, response in zip(batches, responses):
+        if isinstance(response, Exception):
+            errors.append({"cids": batch, "error": str(response)})
+        elif format == "json":
+            records.extend(response.json().get("PropertyTable", {}).get("Properties", []))
+        else:
+            lines = response.text.splitlines()
+            csv_lines.extend(lines if not csv_lines else lines[1:])
+    output = {"properties": records if format == "json" else "\n".join(csv_lines)}
+    if errors:
+        output["errors"] = errors
+    return output
+
 # DB: PDB
+PDBJ_SEARCH_URL = "https://pdbj.org/rest/newweb/search"
+PDB_SUMMARY_URL = "https://www.ebi.ac.uk/pdbe/api/pdb/entry/summary"
+# IDs per PDBe POST (a comma-separated list); chunks are sent concurrently.
+PDB_SUMMARY_BATCH_SIZE = 100
+PDB_MAX_CONCURRENCY = 8
+
+_pdb_semaphore = asyncio.Semaphore(PDB_MAX_CONCURRENCY)
+# Summaries per PDB ID; None records an ID that PDBe does not know.
+_pdb_summary_cache = TTLCache("pdb_entry_summaries", maxsize=8192, ttl=SEARCH_CACHE_TTL["get_pdb_entry_summaries"])
+_MISSING = object()
+
+
 @mcp.tool()
 async def search_pdb_entity(db: str, query: str, limit: int = 20) -> str:
     """
@@ -333,41 +1088,175 @@ async def search_pdb_entity(db: str, query: str, limit: int = 20) -> str:
         str: A JSON-formatted string containing the search results.
     """
     toolcall_log("search_pdb_entity")
-    url = f"https://pdbj.org/rest/newweb/search/{db}?query={query}"
+    if db not in ("pdb", "cc", "prd"):
+        raise ValueError(f"Unsupported database '{db}'. Use 'pdb', 'cc' or 'prd'.")
+    url = f"{PDBJ_SEARCH_URL}/{db}"
+    # limit/offset ask PDBj to cut the result list; the search API is undocumented,
+    # so the slice below still caps the size in case they are ignored
+    params = {"query": query, "limit": limit, "offset": 0}
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, timeout=30.0)
+        response = await _cached_get("search_pdb_entity", url, params=params)
         response.raise_for_status()
-        # Parse the response as JSON
-        total_results = response.json().get("total", 0)
-        result_list = [{entry[0]: entry[1]} for entry in response.json().get("results", [])[:limit]]
-        response_dict = {"total": total_results, "results": result_list}
-        return json.dumps(response_dict)
+        data = response.json()
+        result_list = [{entry[0]: entry[1]} for entry in islice(data.get("results", []), limit)]
+        return json.dumps({"total": data.get("total", 0), "results": result_list})
     except httpx.HTTPError as e:
         print(f"Error searching PDB {db} for {query}: {e}")
         raise
 
+
+def _pdb_summary(pdb_id: str, entry: dict) -> dict:
+    return {
+        "pdb_id": pdb_id,
+        "title": entry.get("title"),
+        "experimental_method": entry.get("experimental_method"),
+        "deposition_date": entry.get("deposition_date"),
+        "release_date": entry.get("release_date"),
+        "number_of_entities": entry.get("number_of_entities"),
+        "authors": [a.get("full_name") for a in entry.get("entry_authors", [])[:5]],
+    }
+
+
+async def _fetch_pdb_summaries(pdb_ids: List[str]) -> Dict[str, Optional[dict]]:
+    """Fetch summaries for one chunk of IDs with a single PDBe POST; None marks IDs not found."""
+    async with _pdb_semaphore:
+        response = await get_client(PDB_SUMMARY_URL).post(PDB_SUMMARY_URL, content=",".join(pdb_ids), timeout=60.0)
+    # PDBe answers 404 when none of the IDs exist
+    if response.status_code == 404:
+        data = {}
+    else:
+        response.raise_for_status()
+        data = response.json()
+    summaries = {}
+    for pdb_id in pdb_ids:
+        entries = data.get(pdb_id, [])
+        summaries[pdb_id] = _pdb_summary(pdb_id, entries[0]) if entries else None
+        _pdb_summary_cache.set(pdb_id, summaries[pdb_id])
+    return summaries
+
+
+@mcp.tool()
+async def get_pdb_entry_summaries(pdb_ids: str) -> dict:
+    """
+    Get short summaries (title, method, dates, authors) for many PDB entries.
+
+    Args:
+        pdb_ids (str): Comma-separated PDB IDs, e.g. "1ABC,4HHB".
+
+    Returns:
+        dict: 'results' (one summary per entry found, in input order), 'not_found',
+            and 'errors' for IDs whose lookup failed.
+    """
+    toolcall_log("get_pdb_entry_summaries")
+    ids = list(dict.fromkeys(i.strip().lower() for i in pdb_ids.split(",") if i.strip()))
+    summaries = {i: _pdb_summary_cache.get(i, _MISSING) for i in ids}
+    uncached = [i for i in ids if summaries[i] is _MISSING]
+    chunks = [uncached[i:i + PDB_SUMMARY_BATCH_SIZE] for i in range(0, len(uncached), PDB_SUMMARY_BATCH_SIZE)]
+    outcomes = await asyncio.gather(*[_fetch_pdb_summaries(chunk) for chunk in chunks], return_exceptions=True)
+    errors = {}
+    for chunk, outcome in zip(chunks, outcomes):
+        if isinstance(outcome, Exception):
+            errors.update((pdb_id, str(outcome)) for pdb_id in chunk)
+        else:
+            summaries.update(outcome)
+    output = {"results": [], "not_found": []}
+    for pdb_id in ids:
+        if pdb_id in errors:
+            continue
+        if summaries[pdb_id] is None:
+            output["not_found"].append(pdb_id)
+        else:
+            output["results"].append(summaries[pdb_id])
+    if errors:
+        output["errors"] = errors
+    return output
+
 # DB: MeSH
+MESH_LOOKUP_URL = "https://id.nlm.nih.gov/mesh/lookup/term"
+# Built by `togo-mcp-build mesh-index`; the NLM API is used when it is absent.
+MESH_INDEX_PATH = CACHE_DIR + "/mesh_index.pickle"
+MESH_HARVEST_PAGE_SIZE = 10000
+# Seconds allowed per harvested page; large OFFSETs are slow on the shared endpoints
+MESH_HARVEST_TIMEOUT = 300.0
+# MeSH is released yearly; an older index is supplemented by the NLM API.
+MESH_INDEX_MAX_AGE = 365 * 86400
+
+_mesh_index: Dict[str, Any] = {"mtime": None, "index": None}
+
+
+def _get_mesh_index() -> Optional[MeshIndex]:
+    """Return the local MeSH index, reloading it if the file was rebuilt."""
+    try:
+        mtime = os.stat(MESH_INDEX_PATH).st_mtime
+    except OSError:
+        return None
+    if _mesh_index["mtime"] != mtime:
+        try:
+            _mesh_index["index"] = MeshIndex.load(MESH_INDEX_PATH)
+        except (OSError, ValueError, pickle.UnpicklingError) as e:
+            logger.warning(f"Could not load MeSH index {MESH_INDEX_PATH}: {e}")
+            _mesh_index["index"] = None
+        _mesh_index["mtime"] = mtime
+    return _mesh_index["index"]
+
+
+async def harvest_mesh_terms() -> List[Tuple[str, str, bool]]:
+    """Read descriptor names and entry terms from the `primary` SPARQL endpoint."""
+    query = """PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+PREFIX meshv: <http://id.nlm.nih.gov/mesh/vocab#>
+SELECT ?descriptor ?label ?preferred
+FROM <http://id.nlm.nih.gov/mesh>
+WHERE {{
+  ?descriptor a meshv:TopicalDescriptor .
+  {{ ?descriptor rdfs:label ?label . BIND(1 AS ?preferred) }}
+  UNION
+  {{ ?descriptor (meshv:concept|meshv:preferredConcept)/(meshv:term|meshv:preferredTerm)/meshv:prefLabel ?label .
+     BIND(0 AS ?preferred) }}
+}}
+ORDER BY ?descriptor ?label
+LIMIT {limit} OFFSET {offset}"""
+    terms = []
+    offset = 0
+    while True:
+        text = await execute_sparql(
+            query.format(limit=MESH_HARVEST_PAGE_SIZE, offset=offset), dbname="mesh", timeout=MESH_HARVEST_TIMEOUT
+        )
+        rows = list(csv.reader(io.StringIO(text)))[1:]
+        for uri, label, preferred in rows:
+            terms.append((uri.rsplit("/", 1)[-1], label, preferred == "1"))
+        if len(rows) < MESH_HARVEST_PAGE_SIZE:
+            return terms
+        offset += MESH_HARVEST_PAGE_SIZE
+
+
 @mcp.tool(enabled=True)
-async def search_mesh_entity(query: str, limit: int = 10) -> str:
+async def search_mesh_entity(query: str, limit: int = 10, match: str = "contains") -> str:
     """
     Search for MeSH ID by query.
 
     Args:
         query (str): The query string to search for.
         limit (int): The maximum number of results to return. Default is 10.
+        match (str): "contains" (default), "startswith" or "exact".
 
     Returns:
         str: A JSON-formatted string containing the search results.
     """
     toolcall_log("search_mesh_entity")
-    url = "https://id.nlm.nih.gov/mesh/lookup/term"
+    if match not in ("exact", "startswith", "contains"):
+        raise ValueError(f"Unsupported match '{match}'. Use 'contains', 'startswith' or 'exact'.")
+    index = _get_mesh_index()
+    if index is not None:
+        results = index.search(query, match=match, limit=limit)
+        # A current index answers on its own, misses included; only an outdated
+        # one falls back to the API for terms added since it was built
+        if results or time.time() - _mesh_index["mtime"] <= MESH_INDEX_MAX_AGE:
+            return json.dumps(results)
     params = {"label": query,
-              "match": "contains",
+              "match": match,
               "limit": limit}
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params, timeout=30.0)
+        response = await _cached_get("search_mesh_entity", MESH_LOOKUP_URL, params=params)
         response.raise_for_status()
         return response.text
     except httpx.HTTPError as e:
@@ -431,13 +1320,12 @@ async def search_reactome_entity(
     
     # Make API call
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                base_url,
-                params=params,
-                headers={"Accept": "application/json"},
-                timeout=30.0
-            )
+        response = await _cached_get(
+            "search_reactome_entity",
+            base_url,
+            params=params,
+            headers={"Accept": "application/json"}
+        )
         response.raise_for_status()
         data = response.json()
     except httpx.HTTPError as e:
@@ -461,7 +1349,289 @@ async def search_reactome_entity(
     
     return results
 
+# Reactome Analysis Service (bulk identifier mapping)
+REACTOME_ANALYSIS_URL = "https://reactome.org/AnalysisService"
+# Reactome keeps analysis results for about a week
+REACTOME_TOKEN_TTL = 6 * 86400
+
+# (sorted identifiers, projection) -> analysis token
+_reactome_tokens = TTLCache("reactome_analysis_tokens", maxsize=256, ttl=REACTOME_TOKEN_TTL)
+
+
+def _reactome_page_params(page: int, page_size: int, species: Optional[str], p_value: float,
+                          include_disease: bool, sort_by: str) -> dict:
+    params = {
+        "page": page,
+        "pageSize": page_size,
+        "sortBy": sort_by,
+        # Most entities found first; p-values, FDRs and names ascending
+        "order": "DESC" if sort_by == "ENTITIES_FOUND" else "ASC",
+        "resource": "TOTAL",
+        "pValue": p_value,
+        "includeDisease": str(include_disease).lower(),
+    }
+    if species:
+        params["species"] = species
+    return params
+
+
+def _reactome_compact(data: dict) -> Dict[str, Any]:
+    """Reduce an analysis result page to counts and one short row per pathway."""
+    pathways = []
+    for pathway in data.get("pathways", []):
+        entities = pathway.get("entities", {})
+        pathways.append({
+            "id": pathway.get("stId"),
+            "name": pathway.get("name"),
+            "species": pathway.get("species", {}).get("name"),
+            "found": entities.get("found"),
+            "total": entities.get("total"),
+            "p_value": entities.get("pValue"),
+            "fdr": entities.get("fdr"),
+        })
+    return {
+        "token": data.get("summary", {}).get("token"),
+        "pathways_found": data.get("pathwaysFound"),
+        "identifiers_not_found": data.get("identifiersNotFound"),
+        "pathways": pathways,
+    }
+
+
+async def _reactome_token_page(token: str, params: dict) -> Optional[dict]:
+    """Return a result page for `token`, or None if the token has expired."""
+    url = f"{REACTOME_ANALYSIS_URL}/token/{token}"
+    response = await _cached_get("get_reactome_analysis", url, params=params)
+    if response.status_code in (404, 410):
+        return None
+    response.raise_for_status()
+    return response.json()
+
+
+@mcp.tool()
+async def analyze_reactome_identifiers(
+    identifiers: str,
+    projection: bool = True,
+    page_size: int = 20,
+    species: Optional[str] = None,
+    p_value: float = 1.0,
+    include_disease: bool = True,
+    sort_by: str = "ENTITIES_PVALUE",
+) -> Dict[str, Any]:
+    """
+    Map many identifiers to Reactome pathways in one request (over-representation analysis).
+
+    Use this instead of one search_reactome_entity call per ID. The list is
+    submitted once; the returned token pages through or re-filters the result
+    with get_reactome_analysis without resubmitting it.
+
+    Args:
+        identifiers (str): Comma- or newline-separated identifiers (UniProt, Ensembl, gene symbols, ChEBI, ...).
+        projection (bool): Project non-human identifiers onto human pathways. Default is True.
+        page_size (int): Pathways per page. Default is 20.
+        species (str, optional): Restrict pathways to a species (name or taxonomy ID), e.g. "9606".
+        p_value (float): Only return pathways with an entities p-value up to this value. Default is 1.0.
+        include_disease (bool): Include disease pathways. Default is True.
+        sort_by (str): "ENTITIES_PVALUE" (default), "ENTITIES_FDR", "ENTITIES_FOUND" or "NAME".
+
+    Returns:
+        Dict[str, Any]: token, pathways_found, identifiers_not_found and the first page of pathways
+            (id, name, species, found, total, p_value, fdr).
+    """
+    toolcall_log("analyze_reactome_identifiers")
+    ids = list(dict.fromkeys(i.strip() for i in re.split(r"[,\n]", identifiers) if i.strip()))
+    if not ids:
+        raise ValueError("No identifiers given.")
+    params = _reactome_page_params(1, page_size, species, p_value, include_disease, sort_by)
+    key = (tuple(sorted(ids)), projection)
+    try:
+        token = _reactome_tokens.get(key)
+        if token is not None:
+            data = await _reactome_token_page(token, params)
+            if data is not None:
+                return _reactome_compact(data)
+        url = f"{REACTOME_ANALYSIS_URL}/identifiers/{'projection' if projection else ''}"
+        response = await get_client(url).post(
+            url,
+            params=params,
+            content="\n".join(ids),
+            headers={"Content-Type": "text/plain", "Accept": "application/json"},
+            timeout=120.0,
+        )
+        response.raise_for_status()
+        result = _reactome_compact(response.json())
+        _reactome_tokens.set(key, result["token"])
+        return result
+    except httpx.HTTPError as e:
+        print(f"Error running Reactome analysis: {e}")
+        raise
+
+
+@mcp.tool()
+async def get_reactome_analysis(
+    token: str,
+    page: int = 1,
+    page_size: int = 20,
+    species: Optional[str] = None,
+    p_value: float = 1.0,
+    include_disease: bool = True,
+    sort_by: str = "ENTITIES_PVALUE",
+    not_found: bool = False,
+) -> Dict[str, Any]:
+    """
+    Page through or re-filter a Reactome analysis started by analyze_reactome_identifiers.
+
+    Args:
+        token (str): The analysis token.
+        page (int): Page number, starting at 1.
+        page_size (int): Pathways per page. Default is 20.
+        species (str, optional): Restrict pathways to a species (name or taxonomy ID).
+        p_value (float): Only return pathways with an entities p-value up to this value.
+        include_disease (bool): Include disease pathways. Default is True.
+        sort_by (str): "ENTITIES_PVALUE" (default), "ENTITIES_FDR", "ENTITIES_FOUND" or "NAME".
+        not_found (bool): If True, return the submitted identifiers that were not found instead of pathways.
+
+    Returns:
+        Dict[str, Any]: The requested page of pathways, or 'not_found' identifiers.
+    """
+    toolcall_log("get_reactome_analysis")
+    try:
+        if not_found:
+            url = f"{REACTOME_ANALYSIS_URL}/token/{token}/notFound"
+            response = await _cached_get("get_reactome_analysis", url, params={"page": page, "pageSize": page_size})
+            response.raise_for_status()
+            return {"token": token, "not_found": [entry.get("id") for entry in response.json()]}
+        params = _reactome_page_params(page, page_size, species, p_value, include_disease, sort_by)
+        data = await _reactome_token_page(token, params)
+    except httpx.HTTPError as e:
+        print(f"Error reading Reactome analysis {token}: {e}")
+        raise
+    if data is None:
+        raise ValueError(f"Reactome analysis token {token} has expired; run analyze_reactome_identifiers again.")
+    return {**_reactome_compact(data), "page": page}
+
 # DB: RhEA
+RHEA_URL = "https://www.rhea-db.org/rhea"
+RHEA_COLUMNS = "rhea-id,equation,chebi-id,ec"
+# Local copy of all reactions, refreshed in the background once a week
+RHEA_SNAPSHOT = CACHE_DIR + "/rhea_reactions.tsv"
+RHEA_REFRESH_INTERVAL = 7 * 86400
+RHEA_HARVEST_PAGE_SIZE = 10000
+# Seconds allowed per download (REST) or harvested page (SPARQL)
+RHEA_HARVEST_TIMEOUT = 300.0
+_RHEA_CHEBI_QUERY = re.compile(r"^CHEBI:\d+$", re.IGNORECASE)
+_RHEA_EC_QUERY = re.compile(r"^(?:EC[:\s]\s*)?(\d+(?:\.(?:\d+|-)){1,3})$", re.IGNORECASE)
+# Plain keywords only; Rhea query syntax (fields, wildcards, boolean operators) goes to the API
+_RHEA_PLAIN_QUERY = re.compile(r"^[\w\s(),+'-]*$")
+
+# "task" holds the running load/refresh task, so it is not garbage-collected
+_rhea: Dict[str, Any] = {"index": None, "loaded_at": None, "task": None}
+
+
+async def fetch_rhea_reactions(source: str = "rest") -> str:
+    """Download all Rhea reactions as TSV (Rhea ID, equation, ChEBI IDs, EC numbers).
+
+    Args:
+        source: "rest" for the Rhea REST API, or "sparql" for the sib SPARQL endpoint.
+    """
+    if source == "rest":
+        params = {"query": "", "columns": RHEA_COLUMNS, "format": "tsv", "limit": 1000000}
+        response = await get_client(RHEA_URL).get(RHEA_URL, params=params, timeout=RHEA_HARVEST_TIMEOUT)
+        response.raise_for_status()
+        return response.text
+
+    query = """PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+PREFIX rhea: <http://rdf.rhea-db.org/>
+SELECT ?accession ?equation
+  (GROUP_CONCAT(DISTINCT ?chebi; separator=";") AS ?chebis)
+  (GROUP_CONCAT(DISTINCT ?ec; separator=";") AS ?ecs)
+WHERE {{
+  ?reaction rdfs:subClassOf rhea:Reaction ;
+    rhea:status rhea:Approved ;
+    rhea:accession ?accession ;
+    rhea:equation ?equation .
+  OPTIONAL {{ ?reaction rhea:side/rhea:contains/rhea:compound/rhea:accession ?chebi . FILTER(STRSTARTS(?chebi, "CHEBI:")) }}
+  OPTIONAL {{ ?reaction rhea:ec ?enzyme . BIND(CONCAT("EC:", STRAFTER(STR(?enzyme), "/enzyme/")) AS ?ec) }}
+}}
+GROUP BY ?accession ?equation
+ORDER BY ?accession
+LIMIT {limit} OFFSET {offset}"""
+    lines = ["Reaction identifier\tEquation\tChEBI identifier\tEC number"]
+    offset = 0
+    while True:
+        text = await execute_sparql(
+            query.format(limit=RHEA_HARVEST_PAGE_SIZE, offset=offset), dbname="rhea", timeout=RHEA_HARVEST_TIMEOUT
+        )
+        rows = list(csv.reader(io.StringIO(text)))[1:]
+        lines.extend("\t".join(row) for row in rows)
+        if len(rows) < RHEA_HARVEST_PAGE_SIZE:
+            return "\n".join(lines) + "\n"
+        offset += RHEA_HARVEST_PAGE_SIZE
+
+
+def save_rhea_snapshot(tsv: str) -> None:
+    os.makedirs(os.path.dirname(RHEA_SNAPSHOT), exist_ok=True)
+    with open(RHEA_SNAPSHOT + ".tmp", "w", encoding="utf-8") as f:
+        f.write(tsv)
+    os.replace(RHEA_SNAPSHOT + ".tmp", RHEA_SNAPSHOT)
+
+
+def _read_rhea_snapshot() -> RheaIndex:
+    with open(RHEA_SNAPSHOT, "r", encoding="utf-8") as f:
+        return RheaIndex.from_tsv(f)
+
+
+async def _load_rhea() -> None:
+    """Load the snapshot, then download a new one if it is missing or outdated.
+
+    Parsing runs in a worker thread so that it does not block the event loop.
+    """
+    try:
+        if _rhea["index"] is None:
+            try:
+                _rhea["index"] = await asyncio.to_thread(_read_rhea_snapshot)
+                _rhea["loaded_at"] = os.path.getmtime(RHEA_SNAPSHOT)
+            except OSError:
+                pass
+        if time.time() - _rhea["loaded_at"] > RHEA_REFRESH_INTERVAL:
+            logger.info("Downloading all Rhea reactions for the local index")
+            tsv = await fetch_rhea_reactions()
+            _rhea["index"] = await asyncio.to_thread(RheaIndex.from_tsv, tsv.splitlines())
+            _rhea["loaded_at"] = time.time()
+            save_rhea_snapshot(tsv)
+    except (httpx.HTTPError, OSError, ValueError) as e:
+        logger.warning(f"Refresh of the local Rhea index failed: {e}")
+    finally:
+        _rhea["task"] = None
+
+
+def _get_rhea_index() -> Optional[RheaIndex]:
+    """Return the local Rhea index, or None until it has been loaded.
+
+    The first call starts a background task that loads the snapshot and
+    downloads a new one if it is missing or a week old; callers never wait
+    for it, and lookups use the API until the index is available.
+    """
+    if _rhea["loaded_at"] is None:
+        _rhea["loaded_at"] = 0.0
+    if time.time() - _rhea["loaded_at"] > RHEA_REFRESH_INTERVAL and _rhea["task"] is None:
+        _rhea["task"] = asyncio.create_task(_load_rhea())
+    return _rhea["index"]
+
+
+def _search_rhea_local(index: RheaIndex, query: str, limit: int) -> Optional[List[Dict[str, str]]]:
+    """Answer `query` from the local index, or return None if it needs the API."""
+    query = query.strip()
+    limit = limit or len(index)
+    if _RHEA_CHEBI_QUERY.match(query):
+        return index.by_chebi(query, limit)
+    ec = _RHEA_EC_QUERY.match(query)
+    if ec:
+        return index.by_ec(ec.group(1), limit)
+    if _RHEA_PLAIN_QUERY.match(query) and not re.search(r"\b(AND|OR|NOT)\b", query):
+        return index.search(query, limit)
+    return None
+
+
 @mcp.tool()
 async def search_rhea_entity(
     query: str,
@@ -474,6 +1644,8 @@ async def search_rhea_entity(
         query (str): Search query string. Examples:
                     - "ATP" - find reactions involving ATP
                     - "glucose" - find reactions with glucose
+                    - "CHEBI:15422" - reactions with a ChEBI participant
+                    - "EC:2.7.1.1" or "EC:2.7.11.-" - reactions of an EC (sub)class
                     - "uniprot:*" - reactions with UniProt annotations
                     - "" - retrieve all reactions
         limit (int, optional): Maximum number of results. Defaults to 100.
@@ -489,9 +1661,13 @@ async def search_rhea_entity(
         ...     print(f"{reaction['rhea_id']}: {reaction['equation']}")
     """
     toolcall_log("search_rhea_entity")
-    # API endpoint
-    url = "https://www.rhea-db.org/rhea"
-    
+    index = _get_rhea_index()
+    if index is not None:
+        results = _search_rhea_local(index, query, limit)
+        if results is not None:
+            return results
+
+    url = RHEA_URL
     params = {
         "query": query,
         "columns": "rhea-id,equation",
@@ -500,8 +1676,7 @@ async def search_rhea_entity(
     }
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params, timeout=30.0)
+        response = await _cached_get("search_rhea_entity", url, params=params)
         response.raise_for_status()
         
         # Parse TSV response
@@ -526,3 +1701,143 @@ async def search_rhea_entity(
     except httpx.HTTPError as e:
         print(f"Error fetching data from Rhea API: {e}")
         return []
+
+######################################
+#####　Federated keyword search #######
+######################################
+# Each adapter runs one database's keyword search (the `keyword_search_api`
+# column of endpoints.csv) and returns (total, hits) with hits as
+# {"id", "label"} dictionaries.
+
+class KeywordSearchUnsupported(Exception):
+    """Raised by an adapter when it cannot search the given database."""
+
+async def _kw_uniprot(dbname: str, keyword: str, limit: int):
+    tsv = await search_uniprot_entity.fn(keyword, limit)
+    hits = []
+    for line in tsv.splitlines()[1:]:
+        fields = line.split("\t")
+        if len(fields) >= 3:
+            hits.append({"id": fields[0], "label": f"{fields[1]} ({fields[2]})"})
+    return None, hits
+
+async def _kw_chembl(dbname: str, keyword: str, limit: int):
+    molecules, targets = await asyncio.gather(
+        search_chembl_molecule.fn(keyword, limit),
+        search_chembl_target.fn(keyword, limit)
+    )
+    hits = [{"id": m["chembl_id"], "label": m["name"], "type": "molecule"} for m in molecules["results"]]
+    hits += [{"id": t["chembl_id"], "label": t["name"], "type": "target"} for t in targets["results"]]
+    return molecules["total_count"] + targets["total_count"], hits
+
+async def _kw_pdb(dbname: str, keyword: str, limit: int):
+    data = json.loads(await search_pdb_entity.fn("pdb", keyword, limit))
+    hits = [{"id": pdb_id, "label": label} for entry in data["results"] for pdb_id, label in entry.items()]
+    return data["total"], hits
+
+async def _kw_mesh(dbname: str, keyword: str, limit: int):
+    data = json.loads(await search_mesh_entity.fn(keyword, limit))
+    hits = [{"id": entry.get("resource", "").rsplit("/", 1)[-1], "label": entry.get("label")} for entry in data]
+    return None, hits
+
+async def _kw_reactome(dbname: str, keyword: str, limit: int):
+    results = await search_reactome_entity.fn(keyword, rows=limit)
+    return None, [{"id": r["id"], "label": r["name"], "type": r["type"]} for r in results[:limit]]
+
+async def _kw_rhea(dbname: str, keyword: str, limit: int):
+    results = await search_rhea_entity.fn(keyword, limit)
+    return None, [{"id": r["rhea_id"], "label": r["equation"]} for r in results]
+
+# RDF Portal database name -> NCBI E-utilities database name
+_NCBI_DB_FOR = {"ncbigene": "gene", "pubchem": "pccompound"}
+
+async def _kw_ncbi(dbname: str, keyword: str, limit: int):
+    from .ncbi_tools import _ncbi_esearch_api
+    data = await _ncbi_esearch_api(db=_NCBI_DB_FOR.get(dbname, dbname), term=keyword, retmax=limit)
+    result = data.get("esearchresult", {})
+    return int(result.get("count", 0)), [{"id": i, "label": None} for i in result.get("idlist", [])]
+
+async def _kw_labels(dbname: str, keyword: str, limit: int):
+    from .rdf_portal import search_labels
+    data = await search_labels.fn(dbname, keyword, limit)
+    if data["status"] == "unsupported":
+        raise KeywordSearchUnsupported(data["message"])
+    if data["status"] != "ok":
+        raise RuntimeError(data["message"])
+    return None, [{"id": hit["iri"], "label": hit["label"]} for hit in data["hits"]]
+
+async def _kw_ontology(dbname: str, keyword: str, limit: int):
+    from .rdf_portal import search_ontology_terms
+    data = await search_ontology_terms.fn(dbname, keyword, limit)
+    if data["status"] != "ok":
+        raise RuntimeError(data["message"])
+    return None, [{"id": hit["id"], "label": hit["label"]} for hit in data["hits"]]
+
+KEYWORD_SEARCH_ADAPTERS = {
+    "search_uniprot_entity": _kw_uniprot,
+    "search_chembl_(molecule|target)": _kw_chembl,
+    "search_pdb_entity": _kw_pdb,
+    "search_mesh_entity": _kw_mesh,
+    "search_reactome_entity": _kw_reactome,
+    "search_rhea_entity": _kw_rhea,
+    "ncbi_esearch": _kw_ncbi,
+    "sparql": _kw_labels,
+    "OLS4:searchClasses": _kw_ontology,
+}
+
+async def _search_one(dbname: str, keyword: str, limit: int, timeout: float) -> Dict[str, Any]:
+    tool = SPARQL_ENDPOINT[dbname]["keyword_search"]
+    adapter = KEYWORD_SEARCH_ADAPTERS.get(tool)
+    if adapter is None:
+        return {"tool": tool, "status": "unsupported",
+                "message": f"No built-in keyword search for {dbname}; use {tool}."}
+    try:
+        total, hits = await asyncio.wait_for(adapter(dbname, keyword, limit), timeout)
+    except asyncio.TimeoutError:
+        return {"tool": tool, "status": "timeout", "message": f"No response within {timeout} s."}
+    except KeywordSearchUnsupported as e:
+        return {"tool": tool, "status": "unsupported", "message": str(e)}
+    except Exception as e:
+        return {"tool": tool, "status": "error", "message": str(e)}
+    return {"tool": tool, "status": "ok", "total": total, "hits": hits}
+
+@mcp.tool()
+async def search_all(
+    keyword: Annotated[str, Field(description="Keyword to search for (e.g., 'BRCA1', 'aspirin', 'apoptosis').")],
+    databases: Annotated[Optional[List[str]], Field(
+        description="Databases to search (see get_sparql_endpoints). Default: every database with a built-in keyword search.",
+        default=None
+    )] = None,
+    limit: Annotated[int, Field(description="Maximum number of hits per database.")] = 10,
+    timeout: Annotated[float, Field(description="Seconds to wait for each database before giving up on it.")] = 15.0
+) -> Dict[str, Any]:
+    """
+    Search several databases for a keyword at once.
+
+    Each database is searched concurrently with its keyword search tool from
+    `get_sparql_endpoints` (UniProt, ChEMBL, PDB, MeSH, Reactome, Rhea, NCBI
+    databases, ...). Databases searched with plain SPARQL use the local
+    label index (see search_labels), and the ontologies listed with
+    OLS4:searchClasses use the local term index (see search_ontology_terms).
+    A database that fails or does not answer within `timeout` is reported
+    with its status; the others are still returned.
+
+    Returns:
+        dict: {"keyword": ..., "results": {dbname: {"tool", "status", "total", "hits"}}}
+            where status is "ok", "timeout", "error" or "unsupported" and
+            hits is a list of {"id", "label"} dictionaries.
+    """
+    toolcall_log("search_all")
+    if databases:
+        unknown = [db for db in databases if db not in SPARQL_ENDPOINT]
+        if unknown:
+            raise ValueError(
+                f"Unknown database(s): {', '.join(unknown)}. "
+                f"Valid databases are: {', '.join(SPARQL_ENDPOINT_KEYS)}"
+            )
+    else:
+        databases = [db for db in SPARQL_ENDPOINT_KEYS
+                     if SPARQL_ENDPOINT[db]["keyword_search"] in KEYWORD_SEARCH_ADAPTERS]
+
+    results = await asyncio.gather(*(_search_one(db, keyword, limit, timeout) for db in databases))
+    return {"keyword": keyword, "results": dict(zip(databases, results))}
@@ -0,0 +1,138 @@
+"""
+Build steps for TogoMCP's local data (run with `togo-mcp-build`).
+
+Usage:
+    togo-mcp-build togoid-table uniprot,ncbigene --ids-file human_uniprot.txt
+    togo-mcp-build togoid-table uniprot,ncbigene --pairs-file uniprot_ncbigene.tsv
+    togo-mcp-build mesh-index [--xml desc2025.xml]
+    togo-mcp-build rhea-index [--sparql]
+    togo-mcp-build label-index [bacdive mediadive ...]
+    togo-mcp-build ontology-index [go mondo ...] [--obo go-basic.obo]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from typing import Iterator, List, Tuple
+
+
+def _read_ids(path: str) -> List[str]:
+    """Read one ID per line (blank lines and '#' comments are skipped)."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def _read_pairs(path: str) -> Iterator[Tuple[str, str]]:
+    """Read tab-separated source/target pairs."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) >= 2 and fields[0] and not fields[0].startswith("#"):
+                yield fields[0], fields[1]
+
+
+def build_togoid_table(args: argparse.Namespace) -> None:
+    from .togoid import build_route_table, export_route_pairs
+
+    route = ",".join(d.strip() for d in args.route.split(","))
+    if args.pairs_file:
+        pairs = _read_pairs(args.pairs_file)
+    else:
+        pairs = asyncio.run(export_route_pairs(route, _read_ids(args.ids_file)))
+    print(build_route_table(route, pairs))
+
+
+def build_mesh_index(args: argparse.Namespace) -> None:
+    from .api_tools import MESH_INDEX_PATH, harvest_mesh_terms
+    from .mesh_index import MeshIndex, read_descriptor_xml
+
+    terms = read_descriptor_xml(args.xml) if args.xml else asyncio.run(harvest_mesh_terms())
+    index = MeshIndex(terms)
+    os.makedirs(os.path.dirname(MESH_INDEX_PATH), exist_ok=True)
+    index.save(MESH_INDEX_PATH)
+    print(f"{len(index)} labels for {len(index.names)} descriptors written to {MESH_INDEX_PATH}")
+
+
+def build_rhea_index(args: argparse.Namespace) -> None:
+    from .api_tools import RHEA_SNAPSHOT, fetch_rhea_reactions, save_rhea_snapshot
+    from .rhea_index import RheaIndex
+
+    tsv = asyncio.run(fetch_rhea_reactions("sparql" if args.sparql else "rest"))
+    index = RheaIndex.from_tsv(tsv.splitlines())
+    save_rhea_snapshot(tsv)
+    print(f"{len(index)} reactions written to {RHEA_SNAPSHOT}")
+
+
+def build_label_index(args: argparse.Namespace) -> None:
+    from .rdf_portal import LABEL_INDEX_DATABASES, harvest_labels
+
+    for dbname in args.databases or LABEL_INDEX_DATABASES:
+        print(f"{dbname}: {asyncio.run(harvest_labels(dbname))} labels")
+
+
+def build_ontology_index(args: argparse.Namespace) -> None:
+    from .rdf_portal import ONTOLOGIES, ONTOLOGY_INDEX_DIR, _term_index_path, harvest_ontology_terms
+    from .term_index import read_obo, write_term_index
+
+    databases = args.databases or list(ONTOLOGIES)
+    if args.obo:
+        if len(databases) != 1:
+            sys.exit("--obo needs exactly one ontology")
+        os.makedirs(ONTOLOGY_INDEX_DIR, exist_ok=True)
+        entries = read_obo(args.obo, ONTOLOGIES[databases[0]]["id_prefix"])
+        print(f"{databases[0]}: {write_term_index(_term_index_path(databases[0]), entries)} terms")
+        return
+    for dbname in databases:
+        print(f"{dbname}: {asyncio.run(harvest_ontology_terms(dbname))} terms")
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(prog="togo-mcp-build", description="Build local data for TogoMCP.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    togoid_table = subparsers.add_parser(
+        "togoid-table",
+        help="Build an offline TogoID conversion table for one route.",
+    )
+    togoid_table.add_argument("route", help="Conversion route, e.g. 'uniprot,ncbigene'")
+    source = togoid_table.add_mutually_exclusive_group(required=True)
+    source.add_argument("--ids-file", help="Source IDs (one per line) to convert through the TogoID API")
+    source.add_argument("--pairs-file", help="Tab-separated source/target pairs to load directly")
+    togoid_table.set_defaults(func=build_togoid_table)
+
+    mesh_index = subparsers.add_parser(
+        "mesh-index",
+        help="Build the local MeSH descriptor index used by search_mesh_entity.",
+    )
+    mesh_index.add_argument("--xml", help="NLM descriptor file (desc20XX.xml); default harvests the SPARQL endpoint")
+    mesh_index.set_defaults(func=build_mesh_index)
+
+    rhea_index = subparsers.add_parser(
+        "rhea-index",
+        help="Download all Rhea reactions for the local index used by search_rhea_entity.",
+    )
+    rhea_index.add_argument("--sparql", action="store_true", help="Harvest the sib SPARQL endpoint instead of the Rhea REST API")
+    rhea_index.set_defaults(func=build_rhea_index)
+
+    label_index = subparsers.add_parser(
+        "label-index",
+        help="Harvest entity labels for search_labels from the SPARQL endpoints.",
+    )
+    label_index.add_argument("databases", nargs="*", help="Databases to harvest (default: all with SPARQL keyword search)")
+    label_index.set_defaults(func=build_label_index)
+
+    ontology_index = subparsers.add_parser(
+        "ontology-index",
+        help="Build the term indexes used by search_ontology_terms (chebi, go, mondo, nando).",
+    )
+    ontology_index.add_argument("databases", nargs="*", help="Ontologies to index (default: all)")
+    ontology_index.add_argument("--obo", help="Read terms from this OBO file instead of the SPARQL endpoint")
+    ontology_index.set_defaults(func=build_ontology_index)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
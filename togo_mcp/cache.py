@@ -0,0 +1,118 @@
+"""
+In-memory caches shared by TogoMCP tools.
+
+Every cache created here is registered by name so that its hit/miss
+statistics can be reported in one place (see `cache_stats`).
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """A size-capped LRU cache whose entries expire after a time-to-live.
+
+    Args:
+        name: Name under which the cache is registered for statistics.
+        maxsize: Maximum number of entries; the least recently used entry
+            is evicted when the cache is full.
+        ttl: Default time-to-live in seconds. `None` means entries never expire.
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: Optional[float] = 3600.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Optional per-namespace counters (e.g. per tool sharing this cache)
+        self.namespaces: Dict[str, Dict[str, int]] = {}
+        CACHES[name] = self
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for `key`, or `default` if absent or expired."""
+        value = self.peek(key, _ABSENT)
+        if value is _ABSENT:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Like `get`, but leave the counting to the caller (see `record`)."""
+        entry = self._data.get(key)
+        if entry is not None:
+            expires, value = entry
+            if expires is None or expires > time.monotonic():
+                self._data.move_to_end(key)
+                return value
+            del self._data[key]
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store `value` under `key`, overriding the default TTL if `ttl` is given."""
+        ttl = self.ttl if ttl is None else ttl
+        expires = None if ttl is None else time.monotonic() + ttl
+        self._data[key] = (expires, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and (entry[0] is None or entry[0] > time.monotonic())
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def record(self, namespace: str, hit: bool) -> None:
+        """Count a hit or miss for `namespace` and the whole cache.
+
+        For lookups made with `peek`, whose outcome (e.g. a stale entry that
+        had to be fetched again) only the caller knows.
+        """
+        counts = self.namespaces.setdefault(namespace, {"hits": 0, "misses": 0})
+        counts["hits" if hit else "misses"] += 1
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss statistics for this cache."""
+        stats = {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": _ratio(self.hits, self.misses),
+        }
+        if self.namespaces:
+            stats["namespaces"] = {
+                namespace: {**counts, "hit_ratio": _ratio(counts["hits"], counts["misses"])}
+                for namespace, counts in self.namespaces.items()
+            }
+        return stats
+
+
+_ABSENT = object()
+
+
+def _ratio(hits: int, misses: int) -> Optional[float]:
+    lookups = hits + misses
+    return round(hits / lookups, 4) if lookups else None
+
+
+# All caches created in the package, keyed by name.
+CACHES: Dict[str, TTLCache] = {}
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Return statistics for every registered cache."""
+    return {name: cache.stats() for name, cache in CACHES.items()}
@@ -0,0 +1,52 @@
+"""
+Shared HTTP clients for outgoing REST calls.
+
+One keep-alive `httpx.AsyncClient` is kept per host (scheme, host, port),
+so repeated calls to the same API reuse their connections instead of
+paying a TCP/TLS handshake every time. HTTP/2 is negotiated when the
+optional `h2` package is installed (`pip install togo-mcp[http2]`).
+The clients are closed by the server lifespan (see server.py).
+"""
+
+from typing import Dict
+
+import httpx
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Keep idle connections open long enough to cover bursts of tool calls.
+CLIENT_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=10, keepalive_expiry=60.0)
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def _origin(url: str) -> str:
+    parsed = httpx.URL(url)
+    port = f":{parsed.port}" if parsed.port else ""
+    return f"{parsed.scheme}://{parsed.host}{port}"
+
+
+def get_client(url: str) -> httpx.AsyncClient:
+    """Return the shared client for the host of `url`.
+
+    The client has no base URL and httpx's default timeout; pass full
+    URLs and per-request timeouts as with a throwaway client.
+    """
+    origin = _origin(url)
+    client = _clients.get(origin)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(http2=HTTP2_AVAILABLE, limits=CLIENT_LIMITS)
+        _clients[origin] = client
+    return client
+
+
+async def close_clients() -> None:
+    """Close every shared client (called on server shutdown)."""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
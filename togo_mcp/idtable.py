@@ -0,0 +1,108 @@
+"""
+Memory-mapped key -> values tables for offline ID conversion.
+
+A table file holds sorted keys and their values in flat arrays, so a
+lookup is a binary search over the memory-mapped file and nothing is
+loaded into memory up front. Layout (all integers unsigned 64-bit, native
+byte order):
+
+    magic "TGIDTBL1" | n_keys | n_values
+    key_offsets[n_keys + 1]       byte offsets into the key blob
+    value_starts[n_keys + 1]      index of each key's first value
+    value_offsets[n_values + 1]   byte offsets into the value blob
+    key blob | value blob         UTF-8 strings, keys sorted bytewise
+"""
+
+import mmap
+import os
+import struct
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MAGIC = b"TGIDTBL1"
+_HEADER = struct.Struct("=8sQQ")
+
+
+class IdTable:
+    """Read-only view of a table file written by `write_table`."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n_keys, n_values = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not an ID table: {path}")
+        view = memoryview(self._mm)
+        pos = _HEADER.size
+        self._key_offsets = view[pos:pos + 8 * (n_keys + 1)].cast("Q")
+        pos += 8 * (n_keys + 1)
+        self._value_starts = view[pos:pos + 8 * (n_keys + 1)].cast("Q")
+        pos += 8 * (n_keys + 1)
+        self._value_offsets = view[pos:pos + 8 * (n_values + 1)].cast("Q")
+        pos += 8 * (n_values + 1)
+        self._key_base = pos
+        self._value_base = pos + self._key_offsets[n_keys]
+        self._n_keys = n_keys
+
+    def __len__(self) -> int:
+        return self._n_keys
+
+    def _key(self, i: int) -> bytes:
+        return self._mm[self._key_base + self._key_offsets[i]:self._key_base + self._key_offsets[i + 1]]
+
+    def _value(self, j: int) -> str:
+        start = self._value_base + self._value_offsets[j]
+        end = self._value_base + self._value_offsets[j + 1]
+        return self._mm[start:end].decode("utf-8")
+
+    def get(self, key: str) -> Optional[List[str]]:
+        """Return the values stored for `key`, or None if the key is absent."""
+        target = key.encode("utf-8")
+        mm, offsets, base = self._mm, self._key_offsets, self._key_base
+        lo, hi = 0, self._n_keys
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if mm[base + offsets[mid]:base + offsets[mid + 1]] < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == self._n_keys or self._key(lo) != target:
+            return None
+        return [self._value(j) for j in range(self._value_starts[lo], self._value_starts[lo + 1])]
+
+
+def write_table(path: str, pairs: Iterable[Tuple[str, str]]) -> int:
+    """Write (key, value) pairs to a table file.
+
+    Duplicate pairs are stored once; values keep their first-seen order.
+
+    Returns:
+        The number of distinct keys written.
+    """
+    grouped: Dict[bytes, Dict[bytes, None]] = {}
+    for key, value in pairs:
+        grouped.setdefault(key.encode("utf-8"), {})[value.encode("utf-8")] = None
+    keys = sorted(grouped)
+
+    key_offsets = array("Q", [0])
+    value_starts = array("Q", [0])
+    value_offsets = array("Q", [0])
+    values: List[bytes] = []
+    for key in keys:
+        key_offsets.append(key_offsets[-1] + len(key))
+        for value in grouped[key]:
+            values.append(value)
+            value_offsets.append(value_offsets[-1] + len(value))
+        value_starts.append(len(values))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(keys), len(values)))
+        key_offsets.tofile(f)
+        value_starts.tofile(f)
+        value_offsets.tofile(f)
+        f.write(b"".join(keys))
+        f.write(b"".join(values))
+    os.replace(tmp_path, path)
+    return len(keys)
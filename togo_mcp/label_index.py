@@ -0,0 +1,181 @@
+"""
+Local full-text index of entity labels harvested from SPARQL endpoints.
+
+For databases without a keyword search API, the entity classes and their
+label properties are read from the ShEx shapes in the MIE file
+(`label_targets`). The harvested (IRI, label, class) rows are stored as
+gzip-compressed TSV and loaded into a word index: each normalized word
+maps to the sorted positions of the labels containing it, and a query
+intersects the postings of its words (the last word also matches as a
+prefix, so partial input still finds entries).
+"""
+
+import bisect
+import gzip
+import os
+import re
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .word_index import prefix_expansions, ranked_unique, words
+
+# String-valued properties whose local name looks like a name or label
+_LABEL_PROPERTY = re.compile(r"^(label|prefLabel|altLabel|title|name|definition|product)$|(Name|Symbol)$")
+_PREFIX = re.compile(r"^\s*PREFIX\s+([\w-]*):\s*<([^>]+)>", re.MULTILINE)
+_SHAPE = re.compile(r"<\w+>\s*\{(.*?)\n\s*\}", re.DOTALL)
+_SHAPE_CLASS = re.compile(r"\ba\s*\[\s*([^\]\s]+)")
+_STRING_PROPERTY = re.compile(r"^\s*([\w-]*:[\w-]+)\s+xsd:string", re.MULTILINE)
+# Prefixes that MIE shapes use without declaring them
+DEFAULT_PREFIXES = {
+    "rdf": "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+    "rdfs": "http://www.w3.org/2000/01/rdf-schema#",
+    "skos": "http://www.w3.org/2004/02/skos/core#",
+    "dcterms": "http://purl.org/dc/terms/",
+    "dct": "http://purl.org/dc/terms/",
+    "dc": "http://purl.org/dc/elements/1.1/",
+    "foaf": "http://xmlns.com/foaf/0.1/",
+}
+
+
+def declared_prefixes(text: str) -> Dict[str, str]:
+    """Return the default prefixes updated with the PREFIX declarations in `text`."""
+    return {**DEFAULT_PREFIXES, **dict(_PREFIX.findall(text))}
+
+
+def expand_curie(curie: str, prefixes: Dict[str, str]) -> Optional[str]:
+    if curie.startswith("<") and curie.endswith(">"):
+        return curie[1:-1]
+    prefix, _, local = curie.partition(":")
+    namespace = prefixes.get(prefix)
+    return namespace + local if namespace else None
+
+
+def label_targets(shape_expressions: str) -> List[Tuple[str, List[str]]]:
+    """Return (class IRI, label property IRIs) for each shape that has labels."""
+    prefixes = declared_prefixes(shape_expressions)
+    targets = []
+    for body in _SHAPE.findall(shape_expressions):
+        cls = _SHAPE_CLASS.search(body)
+        if not cls:
+            continue
+        properties = [
+            expand_curie(curie, prefixes) for curie in _STRING_PROPERTY.findall(body)
+            if _LABEL_PROPERTY.search(curie.partition(":")[2])
+        ]
+        class_iri = expand_curie(cls.group(1), prefixes)
+        properties = [p for p in properties if p]
+        if class_iri and properties:
+            targets.append((class_iri, list(dict.fromkeys(properties))))
+    return targets
+
+
+class LabelIndex:
+    """Word index over (IRI, label, class) rows."""
+
+    def __init__(self, rows: Iterable[Tuple[str, str, str]]):
+        self.iris: List[str] = []
+        self.labels: List[str] = []
+        self.classes: List[str] = []
+        self._class_ids: array = array("H")
+        class_numbers: Dict[str, int] = {}
+        postings: Dict[str, array] = {}
+        for iri, label, cls in rows:
+            i = len(self.iris)
+            self.iris.append(iri)
+            self.labels.append(label)
+            if cls not in class_numbers:
+                class_numbers[cls] = len(self.classes)
+                self.classes.append(cls)
+            self._class_ids.append(class_numbers[cls])
+            for word in set(words(label)):
+                postings.setdefault(word, array("I")).append(i)
+        self.postings = postings
+        self.vocabulary = sorted(postings)
+
+    def __len__(self) -> int:
+        return len(self.iris)
+
+    def _prefix_positions(self, prefix: str) -> set:
+        vocabulary = self.vocabulary
+        start = bisect.bisect_left(vocabulary, prefix)
+        stop = bisect.bisect_left(vocabulary, prefix + "\U0010ffff", start)
+        exact = start < stop and vocabulary[start] == prefix
+        positions = set()
+        for w in prefix_expansions(start, stop, lambda w: len(self.postings[vocabulary[w]]), exact):
+            positions.update(self.postings[vocabulary[w]])
+        return positions
+
+    def search(self, keyword: str, limit: int = 20, class_iri: Optional[str] = None) -> List[Dict[str, str]]:
+        """Return entities whose label contains every word of `keyword`.
+
+        Exact label matches rank first, then labels starting with the
+        keyword, then shorter labels. Each IRI is returned once.
+        """
+        query_words = words(keyword)
+        if not query_words:
+            return []
+        *complete, last = query_words
+        postings = sorted((self.postings.get(word, ()) for word in complete), key=len)
+        if postings and not postings[0]:
+            return []
+        matches = set(postings[0]) if postings else self._prefix_positions(last)
+        for posting in postings[1:]:
+            matches.intersection_update(posting)
+        if postings:
+            matches.intersection_update(self._prefix_positions(last))
+        if class_iri is not None:
+            matches = {i for i in matches if self.classes[self._class_ids[i]] == class_iri}
+
+        query = keyword.strip().casefold()
+        labels = self.labels
+
+        def rank(i):
+            label = labels[i].casefold()
+            return (label != query, not label.startswith(query), len(label), i)
+
+        # Duplicated IRIs are rare, so the best few candidates usually suffice
+        return [
+            {"iri": self.iris[i], "label": self.labels[i], "class": self.classes[self._class_ids[i]]}
+            for i in ranked_unique(matches, rank, self.iris.__getitem__, limit, overfetch=2)
+        ]
+
+
+class LabelWriter:
+    """Write (IRI, label, class) rows as gzip-compressed TSV, page by page.
+
+    The file replaces `path` only when the writer is closed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self._file = gzip.open(path + ".tmp", "wt", encoding="utf-8")
+
+    def write(self, rows: Iterable[Tuple[str, str, str]]) -> None:
+        for iri, label, cls in rows:
+            label = " ".join(label.split())
+            if label:
+                self._file.write(f"{iri}\t{label}\t{cls}\n")
+                self.count += 1
+
+    def close(self) -> int:
+        """Finish the file and return the number of rows written."""
+        self._file.close()
+        os.replace(self.path + ".tmp", self.path)
+        return self.count
+
+    def abort(self) -> None:
+        """Close the file and delete it, leaving any previous index in place."""
+        self._file.close()
+        try:
+            os.remove(self.path + ".tmp")
+        except OSError:
+            pass
+
+
+def read_labels(path: str) -> Iterator[Tuple[str, str, str]]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) == 3:
+                yield fields[0], fields[1], fields[2]
@@ -0,0 +1,139 @@
+"""
+Local MeSH descriptor index for keyword lookups without the NLM API.
+
+Every descriptor name and entry term is stored once, sorted by its
+normalized (case-folded, whitespace-collapsed) form, so exact and prefix
+lookups are binary searches. Substring lookups go through a trigram index:
+the candidates are the entries of the query's rarest trigram, which are
+then checked with a plain substring test.
+
+The index is built by `togo-mcp-build mesh-index`, either from the NLM
+descriptor XML (desc20XX.xml) or by harvesting the `primary` SPARQL
+endpoint, and saved as a pickle of flat lists and arrays.
+"""
+
+import bisect
+import os
+import pickle
+import xml.etree.ElementTree as ET
+from array import array
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+MESH_URI = "http://id.nlm.nih.gov/mesh/"
+FORMAT_VERSION = 1
+
+
+def normalize(label: str) -> str:
+    return " ".join(label.casefold().split())
+
+
+def _trigrams(text: str) -> Iterator[str]:
+    return (text[i:i + 3] for i in range(len(text) - 2))
+
+
+class MeshIndex:
+    """In-memory MeSH label index.
+
+    Args:
+        terms: (descriptor ID, label, is_preferred) triples; `is_preferred`
+            marks the descriptor name as opposed to an entry term.
+    """
+
+    def __init__(self, terms: Iterable[Tuple[str, str, bool]]):
+        unique = {(normalize(label), label, did, bool(preferred)) for did, label, preferred in terms if label}
+        # An entry term that repeats its descriptor's name adds nothing
+        rows = sorted(row for row in unique if row[3] or (row[0], row[1], row[2], True) not in unique)
+        self.keys: List[str] = [row[0] for row in rows]
+        self.labels: List[str] = [row[1] for row in rows]
+        self.ids: List[str] = [row[2] for row in rows]
+        self.preferred = bytearray(row[3] for row in rows)
+        self.names: Dict[str, str] = {row[2]: row[1] for row in rows if row[3]}
+        postings: Dict[str, array] = {}
+        for i, key in enumerate(self.keys):
+            for gram in set(_trigrams(key)):
+                postings.setdefault(gram, array("I")).append(i)
+        self.trigrams = postings
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def load(cls, path: str) -> "MeshIndex":
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+        if data.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported MeSH index format: {path}")
+        index = cls.__new__(cls)
+        index.__dict__.update(data["index"])
+        return index
+
+    def save(self, path: str) -> None:
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"version": FORMAT_VERSION, "index": self.__dict__}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def _candidates(self, query: str, match: str) -> Iterable[int]:
+        if match == "exact":
+            lo = bisect.bisect_left(self.keys, query)
+            hi = bisect.bisect_right(self.keys, query)
+            return range(lo, hi)
+        if match == "startswith":
+            lo = bisect.bisect_left(self.keys, query)
+            hi = bisect.bisect_left(self.keys, query + "\uffff")
+            return range(lo, hi)
+        if len(query) < 3:
+            return (i for i, key in enumerate(self.keys) if query in key)
+        postings = [self.trigrams.get(gram) for gram in set(_trigrams(query))]
+        if not all(postings):
+            return ()
+        rarest = min(postings, key=len)
+        return (i for i in rarest if query in self.keys[i])
+
+    def search(self, query: str, match: str = "contains", limit: int = 10) -> List[Dict[str, str]]:
+        """Return up to `limit` descriptors whose name or entry terms match `query`.
+
+        Exact matches rank first, then descriptor names before entry terms,
+        then shorter labels.
+
+        Args:
+            match: "exact", "startswith" or "contains".
+        """
+        if match not in ("exact", "startswith", "contains"):
+            raise ValueError(f"Unsupported match '{match}'. Use 'exact', 'startswith' or 'contains'.")
+        query = normalize(query)
+        if not query:
+            return []
+        ranked = sorted(
+            self._candidates(query, match),
+            key=lambda i: (self.keys[i] != query, not self.preferred[i], len(self.keys[i]), self.keys[i]),
+        )
+        results = []
+        seen = set()
+        for i in ranked:
+            did = self.ids[i]
+            if did in seen:
+                continue
+            seen.add(did)
+            hit = {"resource": MESH_URI + did, "label": self.names.get(did, self.labels[i])}
+            if not self.preferred[i]:
+                hit["matched_term"] = self.labels[i]
+            results.append(hit)
+            if len(results) >= limit:
+                break
+        return results
+
+
+def read_descriptor_xml(path: str) -> Iterator[Tuple[str, str, bool]]:
+    """Stream (descriptor ID, label, is_preferred) triples from an NLM desc20XX.xml file."""
+    for _, elem in ET.iterparse(path, events=("end",)):
+        if elem.tag != "DescriptorRecord":
+            continue
+        did = elem.findtext("DescriptorUI")
+        name = elem.findtext("DescriptorName/String")
+        if did and name:
+            yield did, name, True
+            for term in elem.iterfind("ConceptList/Concept/TermList/Term/String"):
+                if term.text and term.text != name:
+                    yield did, term.text, False
+        elem.clear()
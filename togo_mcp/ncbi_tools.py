@@ -11,15 +11,22 @@ Provides keyword search functionality for NCBI databases using the esearch API:
 - PubChem Substance (pcsubstance)
 - PubChem BioAssay (pcassay)
 
+Also provides hit counts across all databases (ncbi_gquery), cross-database
+links (ncbi_elink), and record retrieval (ncbi_esummary, ncbi_efetch).
+
 Requires NCBI_API_KEY environment variable for optimal rate limits (10 req/sec vs 3 req/sec).
 """
 
 import os
+import time
+import json
 import asyncio
 import httpx
 from typing import Optional, List, Dict, Any
 from mcp.types import TextContent
 from .server import toolcall_log
+from .cache import TTLCache
+from .clients import get_client
 from fastmcp import FastMCP
 
 
@@ -30,6 +37,13 @@ NCBI_EMAIL = os.environ.get("NCBI_EMAIL", "your-email@example.com")  # NCBI reco
 # Rate limiting
 RATE_LIMIT_DELAY = 0.1 if NCBI_API_KEY else 0.34  # 10/sec with key, 3/sec without
 
+# Search results are cached for an hour; counts barely move within that window.
+ESEARCH_CACHE_TTL = 3600.0
+# Links change with database updates only, so they are kept for a day.
+ELINK_CACHE_TTL = 86400.0
+# Number of IDs sent per (POST) elink request
+ELINK_CHUNK_SIZE = 200
+
 ncbi_mcp = FastMCP("NCBI API server")
 
 class NCBISearchError(Exception):
@@ -37,6 +51,75 @@ class NCBISearchError(Exception):
     pass
 
 
+class _RateLimiter:
+    """Space out requests so that at most one starts every `delay` seconds.
+
+    Unlike a plain `asyncio.sleep` before each request, this also holds when
+    many requests are issued concurrently (e.g. by `ncbi_gquery`).
+    """
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self._lock = asyncio.Lock()
+        self._next_slot = 0.0
+
+    async def wait(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            if self._next_slot > now:
+                await asyncio.sleep(self._next_slot - now)
+                now = self._next_slot
+            self._next_slot = now + self.delay
+
+
+EUTILS_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
+
+# Shared rate limiter for all E-utilities calls (connections are pooled per host).
+_rate_limiter = _RateLimiter(RATE_LIMIT_DELAY)
+_esearch_cache = TTLCache("ncbi_esearch", maxsize=2048, ttl=ESEARCH_CACHE_TTL)
+_elink_cache = TTLCache("ncbi_elink", maxsize=100000, ttl=ELINK_CACHE_TTL)
+
+# Database name aliases accepted by the tools
+DB_ALIASES = {
+    "ncbigene": "gene",
+}
+
+
+def _normalize_db(database: str) -> str:
+    """Map a database name or alias to the E-utilities database name."""
+    return DB_ALIASES.get(database.lower(), database.lower())
+
+
+async def _eutils_request(
+    endpoint: str,
+    params: Dict[str, Any],
+    method: str = "GET"
+) -> httpx.Response:
+    """
+    Send a rate-limited request to an E-utilities endpoint.
+
+    Args:
+        endpoint: E-utility script name (e.g., "esearch.fcgi")
+        params: Query parameters; tool, email and api_key are added here
+        method: "GET", or "POST" for long ID lists
+
+    Returns:
+        The HTTP response (status already checked)
+    """
+    params = {**params, "tool": "TogoMCP", "email": NCBI_EMAIL}
+    if NCBI_API_KEY:
+        params["api_key"] = NCBI_API_KEY
+
+    url = f"{EUTILS_URL}/{endpoint}"
+    await _rate_limiter.wait()
+    if method == "POST":
+        response = await get_client(url).post(url, data=params, timeout=30.0)
+    else:
+        response = await get_client(url).get(url, params=params, timeout=30.0)
+    response.raise_for_status()
+    return response
+
+
 # Database configuration with metadata
 NCBI_DATABASES = {
     "gene": {
@@ -112,7 +195,8 @@ async def _ncbi_esearch_api(
     retmax: int = 20,
     retstart: int = 0,
     sort: Optional[str] = None,
-    field: Optional[str] = None
+    field: Optional[str] = None,
+    rettype: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Core function to query NCBI E-utilities esearch API.
@@ -124,24 +208,22 @@ async def _ncbi_esearch_api(
         retstart: Starting index for pagination
         sort: Sort order (database-specific)
         field: Specific field to search in
+        rettype: "count" to return only the hit count (no ID list)
     
     Returns:
         Parsed JSON response from NCBI
     """
-    base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
-    
     params = {
         "db": db,
         "term": term,
-        "retmax": retmax,
-        "retstart": retstart,
         "retmode": "json",
-        "tool": "TogoMCP",
-        "email": NCBI_EMAIL
     }
     
-    if NCBI_API_KEY:
-        params["api_key"] = NCBI_API_KEY
+    if rettype == "count":
+        params["rettype"] = "count"
+    else:
+        params["retmax"] = retmax
+        params["retstart"] = retstart
     
     if sort:
         params["sort"] = sort
@@ -149,25 +231,34 @@ async def _ncbi_esearch_api(
     if field:
         params["field"] = field
     
-    # Rate limiting
-    await asyncio.sleep(RATE_LIMIT_DELAY)
+    cache_key = tuple(sorted(params.items()))
+    data = _esearch_cache.get(cache_key)
+    if data is not None:
+        return data
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        try:
-            response = await client.get(base_url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            # Check for errors in NCBI response
-            if "error" in data:
-                raise NCBISearchError(f"NCBI API error: {data['error']}")
-            
-            return data
-            
-        except httpx.HTTPError as e:
-            raise NCBISearchError(f"HTTP error occurred: {str(e)}")
-        except Exception as e:
-            raise NCBISearchError(f"Error querying NCBI: {str(e)}")
+    try:
+        response = await _eutils_request("esearch.fcgi", params)
+        data = response.json()
+    except httpx.HTTPError as e:
+        raise NCBISearchError(f"HTTP error occurred: {str(e)}")
+    except Exception as e:
+        raise NCBISearchError(f"Error querying NCBI: {str(e)}")
+    
+    # Check for errors in NCBI response
+    if "error" in data:
+        raise NCBISearchError(f"NCBI API error: {data['error']}")
+    esearch_result = data.get("esearchresult", {})
+    if "ERROR" in esearch_result:
+        raise NCBISearchError(f"NCBI API error: {esearch_result['ERROR']}")
+    
+    _esearch_cache.set(cache_key, data)
+    return data
+
+
+async def _ncbi_count(db: str, term: str, field: Optional[str] = None) -> int:
+    """Return the number of records in `db` matching `term`."""
+    data = await _ncbi_esearch_api(db=db, term=term, field=field, rettype="count")
+    return int(data.get("esearchresult", {}).get("count", 0))
 
 
 def _format_esearch_result(data: Dict[str, Any], db: str, query: str) -> str:
@@ -215,7 +306,8 @@ async def ncbi_esearch(
     max_results: int = 20,
     start_index: int = 0,
     sort_by: Optional[str] = None,
-    search_field: Optional[str] = None
+    search_field: Optional[str] = None,
+    count_only: bool = False
 ) -> List[TextContent]:
     """
     Search NCBI databases using E-utilities esearch API.
@@ -238,6 +330,8 @@ async def ncbi_esearch(
         start_index: Starting index for pagination (default: 0)
         sort_by: Optional sort order (e.g., "relevance", "pub_date" for PubMed)
         search_field: Optional specific field to search in
+        count_only: If True, return only the total number of hits (no IDs).
+            Much cheaper when the question is "how many ...".
     
     Returns:
         Formatted search results with database-specific IDs
@@ -247,14 +341,12 @@ async def ncbi_esearch(
         - Search PubMed: database="pubmed", query="CRISPR gene editing"
         - Search for E. coli: database="taxonomy", query="Escherichia coli"
         - Search PubChem: database="pccompound", query="aspirin"
+        - Count ClinVar variants: database="clinvar", query="BRCA1", count_only=True
     """
     toolcall_log("ncbi_esearch")
     
     # Normalize database name (handle aliases)
-    db_aliases = {
-        "ncbigene": "gene",
-    }
-    normalized_db = db_aliases.get(database.lower(), database.lower())
+    normalized_db = _normalize_db(database)
     
     # Validate database
     if normalized_db not in NCBI_DATABASES:
@@ -265,6 +357,14 @@ async def ncbi_esearch(
         )]
     
     try:
+        if count_only:
+            count = await _ncbi_count(normalized_db, query, field=search_field)
+            db_label = NCBI_DATABASES[normalized_db]["label"]
+            return [TextContent(
+                type="text",
+                text=f"{db_label}\nQuery: {query}\nTotal Results: {count}"
+            )]
+        
         data = await _ncbi_esearch_api(
             db=normalized_db,
             term=query,
@@ -283,6 +383,62 @@ async def ncbi_esearch(
         return [TextContent(type="text", text=f"Unexpected error: {str(e)}")]
 
 
+@ncbi_mcp.tool()
+async def ncbi_gquery(
+    query: str,
+    databases: Optional[List[str]] = None,
+    search_field: Optional[str] = None
+) -> List[TextContent]:
+    """
+    Count hits for one query in every supported NCBI database at once.
+    
+    Runs a count-only esearch against each database concurrently (still
+    subject to the NCBI rate limit) and returns a per-database hit table,
+    similar to NCBI's global query (gquery) page.
+    
+    Args:
+        query: Search query (Entrez syntax)
+        databases: Optional subset of databases to query (default: all
+            databases listed by ncbi_list_databases)
+        search_field: Optional specific field to search in
+    
+    Returns:
+        Table of hit counts per database
+    
+    Example:
+        - ncbi_gquery(query="BRCA1") -> counts in gene, clinvar, pubmed, ...
+    """
+    toolcall_log("ncbi_gquery")
+    
+    if databases:
+        dbs = [_normalize_db(db) for db in databases]
+        unsupported = [db for db in dbs if db not in NCBI_DATABASES]
+        if unsupported:
+            supported_dbs = ", ".join(NCBI_DATABASES.keys())
+            return [TextContent(
+                type="text",
+                text=f"Error: Unsupported database(s) {', '.join(unsupported)}. Supported databases: {supported_dbs}"
+            )]
+    else:
+        dbs = list(NCBI_DATABASES.keys())
+    
+    counts = await asyncio.gather(
+        *(_ncbi_count(db, query, field=search_field) for db in dbs),
+        return_exceptions=True
+    )
+    
+    width = max(len(NCBI_DATABASES[db]["label"]) for db in dbs)
+    result = f"NCBI Global Query\n{'=' * 50}\nQuery: {query}\n\n"
+    for db, count in zip(dbs, counts):
+        label = NCBI_DATABASES[db]["label"].ljust(width)
+        if isinstance(count, Exception):
+            result += f"{label}  {'error':>12}  (database=\"{db}\"): {count}\n"
+        else:
+            result += f"{label}  {count:>12}  (database=\"{db}\")\n"
+    
+    return [TextContent(type="text", text=result)]
+
+
 @ncbi_mcp.tool()
 async def ncbi_list_databases() -> List[TextContent]:
     """
@@ -305,6 +461,7 @@ async def ncbi_list_databases() -> List[TextContent]:
     result += "\nUsage:\n"
     result += "  Use ncbi_esearch(database=\"<db_name>\", query=\"<your_query>\")\n"
     result += "  Example: ncbi_esearch(database=\"gene\", query=\"BRCA1 AND human[organism]\")\n"
+    result += "  Hit counts in all databases: ncbi_gquery(query=\"<your_query>\")\n"
     
     return [TextContent(type="text", text=result)]
 
@@ -325,35 +482,19 @@ async def ncbi_esummary(database: str, ids: List[str]) -> List[TextContent]:
     """
     toolcall_log("ncbi_esummary")
     
-    # Normalize database name
-    db_aliases = {"ncbigene": "gene"}
-    normalized_db = db_aliases.get(database.lower(), database.lower())
-    
-    base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi"
-    
     params = {
-        "db": normalized_db,
+        "db": _normalize_db(database),
         "id": ",".join(ids),
         "retmode": "json",
-        "tool": "TogoMCP",
-        "email": NCBI_EMAIL
     }
     
-    if NCBI_API_KEY:
-        params["api_key"] = NCBI_API_KEY
-    
-    await asyncio.sleep(RATE_LIMIT_DELAY)
-    
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(base_url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            # Format the response nicely
-            import json
-            formatted_json = json.dumps(data, indent=2)
-            return [TextContent(type="text", text=formatted_json)]
+        response = await _eutils_request("esummary.fcgi", params)
+        data = response.json()
+        
+        # Format the response nicely
+        formatted_json = json.dumps(data, indent=2)
+        return [TextContent(type="text", text=formatted_json)]
             
     except Exception as e:
         return [TextContent(type="text", text=f"Error fetching summaries: {str(e)}")]
@@ -381,31 +522,130 @@ async def ncbi_efetch(
     """
     toolcall_log("ncbi_efetch")
     
-    # Normalize database name
-    db_aliases = {"ncbigene": "gene"}
-    normalized_db = db_aliases.get(database.lower(), database.lower())
-    
-    base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
-    
     params = {
-        "db": normalized_db,
+        "db": _normalize_db(database),
         "id": ",".join(ids),
         "rettype": rettype,
         "retmode": retmode,
-        "tool": "TogoMCP",
-        "email": NCBI_EMAIL
     }
     
-    if NCBI_API_KEY:
-        params["api_key"] = NCBI_API_KEY
-    
-    await asyncio.sleep(RATE_LIMIT_DELAY)
-    
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(base_url, params=params)
-            response.raise_for_status()
-            return [TextContent(type="text", text=response.text)]
+        response = await _eutils_request("efetch.fcgi", params)
+        return [TextContent(type="text", text=response.text)]
             
     except Exception as e:
         return [TextContent(type="text", text=f"Error fetching records: {str(e)}")]
+
+
+@ncbi_mcp.tool()
+async def ncbi_elink(
+    source_database: str,
+    target_database: str,
+    ids: List[str],
+    link_name: Optional[str] = None,
+    max_links_per_id: int = 100
+) -> List[TextContent]:
+    """
+    Find linked records in another NCBI database using elink (cmd=neighbor).
+    
+    Each source ID is linked separately, so the result maps every source ID
+    to its own targets. Long ID lists are split into chunks and sent by POST;
+    links are cached per (source database, target database, link name, ID).
+    
+    Args:
+        source_database: NCBI database of the given IDs (e.g., "gene", "clinvar")
+        target_database: NCBI database to link to (e.g., "pubmed", "gene")
+        ids: List of source IDs (any length)
+        link_name: Optional link name (e.g., "gene_pubmed_rif", "clinvar_gene").
+            Defaults to "<source_database>_<target_database>".
+        max_links_per_id: Maximum number of target IDs listed per source ID
+            (default: 100). The full count is always reported.
+    
+    Returns:
+        JSON with "links" (source ID -> target IDs), "counts" (source ID ->
+        number of targets) and "errors" for chunks that failed
+    
+    Examples:
+        - Genes to PubMed: source_database="gene", target_database="pubmed", ids=["672", "7157"]
+        - ClinVar to genes: source_database="clinvar", target_database="gene", ids=["17661"]
+    """
+    toolcall_log("ncbi_elink")
+    
+    dbfrom = _normalize_db(source_database)
+    db = _normalize_db(target_database)
+    link_name = link_name or f"{dbfrom}_{db}"
+    
+    unique_ids = list(dict.fromkeys(str(i).strip() for i in ids if str(i).strip()))
+    links: Dict[str, List[str]] = {}
+    missing = []
+    for source_id in unique_ids:
+        cached = _elink_cache.get((dbfrom, db, link_name, source_id))
+        if cached is None:
+            missing.append(source_id)
+        else:
+            links[source_id] = cached
+    
+    chunks = [missing[i:i + ELINK_CHUNK_SIZE] for i in range(0, len(missing), ELINK_CHUNK_SIZE)]
+    results = await asyncio.gather(
+        *(_ncbi_elink_chunk(dbfrom, db, link_name, chunk) for chunk in chunks),
+        return_exceptions=True
+    )
+    
+    errors = []
+    for chunk, result in zip(chunks, results):
+        if isinstance(result, Exception):
+            errors.append({"ids": chunk, "error": str(result)})
+            continue
+        for source_id in chunk:
+            targets = result.get(source_id, [])
+            _elink_cache.set((dbfrom, db, link_name, source_id), targets)
+            links[source_id] = targets
+    
+    ordered = [source_id for source_id in unique_ids if source_id in links]
+    output = {
+        "dbfrom": dbfrom,
+        "db": db,
+        "linkname": link_name,
+        "links": {source_id: links[source_id][:max_links_per_id] for source_id in ordered},
+        "counts": {source_id: len(links[source_id]) for source_id in ordered},
+    }
+    if errors:
+        output["errors"] = errors
+    
+    return [TextContent(type="text", text=json.dumps(output))]
+
+
+async def _ncbi_elink_chunk(
+    dbfrom: str,
+    db: str,
+    link_name: str,
+    ids: List[str]
+) -> Dict[str, List[str]]:
+    """
+    Run one elink request for a chunk of IDs.
+    
+    Returns:
+        Mapping of source ID -> linked target IDs
+    """
+    params = {
+        "dbfrom": dbfrom,
+        "db": db,
+        "id": ids,  # repeated id= parameters give one linkset per source ID
+        "cmd": "neighbor",
+        "linkname": link_name,
+        "retmode": "json",
+    }
+    response = await _eutils_request("elink.fcgi", params, method="POST")
+    data = response.json()
+    if "ERROR" in data:
+        raise NCBISearchError(f"NCBI API error: {data['ERROR']}")
+    
+    mapping: Dict[str, List[str]] = {}
+    for linkset in data.get("linksets", []):
+        targets = []
+        for linksetdb in linkset.get("linksetdbs", []):
+            if linksetdb.get("linkname") == link_name:
+                targets.extend(str(link) for link in linksetdb.get("links", []))
+        for source_id in linkset.get("ids", []):
+            mapping[str(source_id)] = targets
+    return mapping
@@ -1,10 +1,22 @@
+import asyncio
+import csv
+import io
 import httpx
+import json
 import os
+import re
+import time
 import yaml
 import sys
-from typing import Annotated, List, Dict, Any
+import zlib
+from functools import lru_cache
+from string import Template
+from typing import Annotated, List, Dict, Any, Optional
 from pydantic import Field
 from .server import *
+from .cache import TTLCache
+from .label_index import LabelIndex, LabelWriter, declared_prefixes, expand_curie, label_targets, read_labels
+from .term_index import EXACT, LABEL, RELATED, TermIndex, write_term_index
 
 # @mcp.resource("resource://boilerplate")
 # def boilerplate() -> str:
@@ -217,31 +229,134 @@ PREFIX owl: <http://www.w3.org/2002/07/owl#>
     """
     return await execute_sparql(sparql_query, dbname)
 
+# --- Graph catalog: MIE graphs plus a cached probe of each endpoint --- #
+GRAPH_CATALOG_PATH = CACHE_DIR + "/graph_catalog.json"
+GRAPH_CATALOG_TTL = 86400
+# Wait this long before probing again after a failed probe
+GRAPH_PROBE_RETRY = 3600
+# Seconds allowed for one probe; the full scan is slow on the large endpoints
+GRAPH_PROBE_TIMEOUT = 600.0
+# Full scan of the endpoint; run at most once per GRAPH_CATALOG_TTL
+GRAPH_PROBE_QUERY = """SELECT DISTINCT ?graph WHERE {
+  GRAPH ?graph {
+    ?s ?p ?o .
+  }
+}"""
+
+# endpoint name -> {"graphs": [...], "probed_at": epoch seconds}
+_graph_probes: Dict[str, Dict[str, Any]] = {}
+_graph_probe_tasks: Dict[str, asyncio.Task] = {}
+_graph_probe_failures: Dict[str, float] = {}
+
+
+@lru_cache(maxsize=None)
+def _mie_graphs() -> Dict[str, tuple]:
+    """Return the databases declaring each graph in their MIE schema_info."""
+    graphs: Dict[str, list] = {}
+    for dbname in SPARQL_ENDPOINT_KEYS:
+        try:
+            declared = _load_mie(dbname).get("schema_info", {}).get("graphs") or []
+        except (OSError, yaml.YAMLError):
+            continue
+        for graph in declared:
+            graphs.setdefault(graph, []).append(dbname)
+    return {graph: tuple(dbnames) for graph, dbnames in graphs.items()}
+
+
+def _load_graph_probes() -> None:
+    try:
+        with open(GRAPH_CATALOG_PATH, "r", encoding="utf-8") as f:
+            _graph_probes.update(json.load(f))
+    except (OSError, ValueError):
+        pass
+
+
+async def _probe_graphs(endpoint_name: str) -> Dict[str, Any]:
+    """List the named graphs of an endpoint and save the result with the catalog."""
+    text = await execute_sparql(GRAPH_PROBE_QUERY, endpoint_name=endpoint_name, timeout=GRAPH_PROBE_TIMEOUT)
+    graphs = [row[0] for row in list(csv.reader(io.StringIO(text)))[1:] if row]
+    probe = {"graphs": graphs, "probed_at": time.time()}
+    _graph_probes[endpoint_name] = probe
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = GRAPH_CATALOG_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(_graph_probes, f)
+    os.replace(tmp_path, GRAPH_CATALOG_PATH)
+    return probe
+
+
+async def _probe_in_background(endpoint_name: str) -> None:
+    try:
+        await _probe_graphs(endpoint_name)
+    except (httpx.HTTPError, OSError) as e:
+        logger.warning(f"Graph probe of {endpoint_name} failed: {e}")
+        _graph_probe_failures[endpoint_name] = time.time()
+    finally:
+        _graph_probe_tasks.pop(endpoint_name, None)
+
+
+async def get_graph_catalog(endpoint_name: str, refresh: bool = False) -> Dict[str, tuple]:
+    """Return {graph: databases declaring it} for the graphs of an endpoint.
+
+    The catalog combines the graphs declared in the MIE files with the last
+    probe of the endpoint. A missing or day-old probe is refreshed in the
+    background while the current catalog is served; `refresh` waits for a
+    new probe instead, or for the probe already in progress.
+    """
+    if not _graph_probes:
+        _load_graph_probes()
+    if refresh:
+        running = _graph_probe_tasks.get(endpoint_name)
+        if running is not None:
+            await asyncio.shield(running)
+        else:
+            await _probe_graphs(endpoint_name)
+    probe = _graph_probes.get(endpoint_name)
+    now = time.time()
+    if ((probe is None or now - probe["probed_at"] > GRAPH_CATALOG_TTL)
+            and endpoint_name not in _graph_probe_tasks
+            and now - _graph_probe_failures.get(endpoint_name, 0) > GRAPH_PROBE_RETRY):
+        _graph_probe_tasks[endpoint_name] = asyncio.create_task(_probe_in_background(endpoint_name))
+    databases = set(ENDPOINT_NAME_TO_DATABASES[endpoint_name])
+    catalog = {graph: dbnames for graph, dbnames in _mie_graphs().items() if databases.intersection(dbnames)}
+    for graph in (probe or {}).get("graphs", []):
+        catalog.setdefault(graph, ())
+    return catalog
+
+
 @mcp.tool(
         enabled=True,
         name="get_graph_list",
         description="Get a list of named graphs in a specific RDF database."
 )
 async def get_graph_list(
-    dbname: Annotated[str, Field(description=DBNAME_DESCRIPTION)]
+    dbname: Annotated[str, Field(description=DBNAME_DESCRIPTION)],
+    refresh: Annotated[bool, Field(description="Probe the endpoint now instead of using the cached graph list (slow).")] = False
     ) -> str:
     f"""
     Get a list of named graphs in a specific RDF database.
 
+    The list is served from a catalog of the graphs declared in the MIE
+    files and a daily probe of the endpoint, so it covers every graph on
+    the endpoint hosting the database.
+
     Args:
         dbname (str): The name of the database for which to retrieve the named graphs. Supported values are {', '.join(SPARQL_ENDPOINT.keys())}.
+        refresh (bool): Probe the endpoint before answering.
 
     Returns:
-        str: CSV-formatted list of named graphs.
+        str: CSV-formatted list of named graphs, with the databases whose MIE file declares each graph.
     """
     toolcall_log("get_graph_list")
-    sparql_query = '''
-SELECT DISTINCT ?graph WHERE {
-  GRAPH ?graph {
-    ?s ?p ?o .
-  }
-}'''
-    return await execute_sparql(sparql_query, dbname)
+    if dbname not in SPARQL_ENDPOINT:
+        raise ValueError(f"Unknown database: {dbname}. Valid databases are: {', '.join(SPARQL_ENDPOINT_KEYS)}")
+    catalog = await get_graph_catalog(SPARQL_ENDPOINT[dbname]["endpoint_name"], refresh)
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator="\n")
+    writer.writerow(["graph", "databases"])
+    for graph in sorted(catalog):
+        writer.writerow([graph, ";".join(catalog[graph])])
+    return output.getvalue()
 
 @mcp.tool(
         enabled=True,
@@ -370,3 +485,444 @@ def get_sparql_example(
             return file.read()
     except Exception as e:
         return f"Error reading SPARQL example file for '{dbname}': {e}"
+
+# --- Local label index for databases searched with plain SPARQL --- #
+LABEL_INDEX_DIR = CACHE_DIR + "/labels"
+LABEL_INDEX_TTL = 30 * 86400
+LABEL_HARVEST_PAGE_SIZE = 10000
+# Rows harvested per (class, label property); keeps very large classes bounded
+LABEL_HARVEST_MAX_ROWS = 100000
+# Seconds allowed per harvested page; large OFFSETs are slow on the shared endpoints
+LABEL_HARVEST_TIMEOUT = 300.0
+# Databases whose keyword_search in endpoints.csv is plain SPARQL
+LABEL_INDEX_DATABASES = [db for db in SPARQL_ENDPOINT_KEYS if SPARQL_ENDPOINT[db]["keyword_search"] == "sparql"]
+
+_label_indexes: Dict[str, tuple] = {}
+_label_harvests: Dict[str, asyncio.Task] = {}
+# Index builds from a newly written file, run in a worker thread
+_label_builds: Dict[str, asyncio.Task] = {}
+# One harvest at a time, so the shared endpoints are not flooded
+_label_harvest_lock = asyncio.Lock()
+
+
+def _label_index_path(dbname: str) -> str:
+    return os.path.join(LABEL_INDEX_DIR, f"{dbname}.tsv.gz")
+
+
+def _load_mie(dbname: str) -> Dict[str, Any]:
+    with open(os.path.join(MIE_DIR, f"{dbname}.yaml"), "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
+@lru_cache(maxsize=None)
+def _label_targets(dbname: str) -> tuple:
+    return tuple(label_targets(_load_mie(dbname).get("shape_expressions", "")))
+
+
+async def harvest_labels(dbname: str) -> int:
+    """Harvest (IRI, label, class) rows for `dbname` into its label index file.
+
+    Classes and label properties come from the MIE shape expressions; each
+    (class, property) pair is read in pages of LABEL_HARVEST_PAGE_SIZE rows
+    from the graphs listed in the MIE schema_info.
+
+    Returns:
+        The number of rows written.
+    """
+    mie = _load_mie(dbname)
+    graphs = mie.get("schema_info", {}).get("graphs") or []
+    from_clauses = "\n".join(f"FROM <{graph}>" for graph in graphs)
+    os.makedirs(LABEL_INDEX_DIR, exist_ok=True)
+    writer = LabelWriter(_label_index_path(dbname))
+    try:
+        for class_iri, properties in _label_targets(dbname):
+            for prop in properties:
+                for offset in range(0, LABEL_HARVEST_MAX_ROWS, LABEL_HARVEST_PAGE_SIZE):
+                    query = f"""SELECT ?entity ?label
+{from_clauses}
+WHERE {{ ?entity a <{class_iri}> ; <{prop}> ?label . }}
+LIMIT {LABEL_HARVEST_PAGE_SIZE} OFFSET {offset}"""
+                    text = await execute_sparql(query, dbname, timeout=LABEL_HARVEST_TIMEOUT)
+                    page = list(csv.reader(io.StringIO(text)))[1:]
+                    writer.write((entity, label, class_iri) for entity, label in page)
+                    if len(page) < LABEL_HARVEST_PAGE_SIZE:
+                        break
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.close()
+
+
+async def _harvest_in_background(dbname: str) -> None:
+    try:
+        async with _label_harvest_lock:
+            count = await harvest_labels(dbname)
+        logger.info(f"Label index for {dbname}: {count} labels")
+    except (httpx.HTTPError, OSError, ValueError) as e:
+        logger.warning(f"Label harvest for {dbname} failed: {e}")
+    finally:
+        _label_harvests.pop(dbname, None)
+
+
+async def _build_label_index(dbname: str, path: str, mtime: float) -> None:
+    """Load the index file of `dbname` off the event loop; a corrupt file is harvested again."""
+    previous = _label_indexes.get(dbname, (None, None))[1]
+    try:
+        index = await asyncio.to_thread(lambda: LabelIndex(read_labels(path)))
+    except (OSError, EOFError, ValueError, zlib.error) as e:
+        logger.warning(f"Could not read label index {path}: {e}")
+        # Keep serving the previous index; do not retry this file
+        index = previous
+        if dbname not in _label_harvests:
+            _label_harvests[dbname] = asyncio.create_task(_harvest_in_background(dbname))
+    finally:
+        _label_builds.pop(dbname, None)
+    _label_indexes[dbname] = (mtime, index)
+
+
+def get_label_index(dbname: str) -> Optional[LabelIndex]:
+    """Return the label index of `dbname`, or None while it is being built.
+
+    A missing or outdated index file starts a background harvest, and a
+    newly written file is loaded in a worker thread; the previous index is
+    still served until the new one is ready.
+    """
+    path = _label_index_path(dbname)
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        mtime = None
+    if (mtime is None or time.time() - mtime > LABEL_INDEX_TTL) and dbname not in _label_harvests:
+        _label_harvests[dbname] = asyncio.create_task(_harvest_in_background(dbname))
+    if mtime is None:
+        return None
+    cached = _label_indexes.get(dbname, (None, None))
+    if cached[0] != mtime and dbname not in _label_builds:
+        _label_builds[dbname] = asyncio.create_task(_build_label_index(dbname, path, mtime))
+    return cached[1]
+
+
+@mcp.tool(
+        enabled=True,
+        name="search_labels",
+        description="Keyword search over entity labels of databases without a keyword search API (ensembl, amrportal, bacdive, mediadive, ddbj, glycosmos), answered from a local index."
+)
+async def search_labels(
+    dbname: Annotated[str, Field(description=f"One of: {', '.join(LABEL_INDEX_DATABASES)}")],
+    keyword: Annotated[str, Field(description="Words to find in entity labels; the last word may be a prefix.")],
+    limit: Annotated[int, Field(description="Maximum number of hits.")] = 20,
+    class_iri: Annotated[Optional[str], Field(description="Only return entities of this class (full IRI).", default=None)] = None
+) -> Dict[str, Any]:
+    """
+    Search entity labels of a database from the local label index.
+
+    Use this instead of bif:contains or regex label scans. The index holds
+    the labels of the main entity classes in the database's MIE file; it
+    is built in the background on first use.
+
+    Returns:
+        dict: {"dbname", "status", "hits"} with hits as {"iri", "label", "class"};
+            status is "ok", or "building" while the index is not yet available.
+    """
+    toolcall_log("search_labels")
+    if dbname not in LABEL_INDEX_DATABASES:
+        raise ValueError(f"No label index for '{dbname}'. Available: {', '.join(LABEL_INDEX_DATABASES)}")
+    if not _label_targets(dbname):
+        return {"dbname": dbname, "status": "unsupported",
+                "message": f"The MIE shapes of {dbname} define no label properties; use run_sparql."}
+    index = get_label_index(dbname)
+    if index is None:
+        return {"dbname": dbname, "status": "building",
+                "message": "The label index is being built; use run_sparql meanwhile and try again later."}
+    return {"dbname": dbname, "status": "ok", "hits": index.search(keyword, limit, class_iri)}
+
+# --- Local ontology term index (chebi, go, mondo, nando) --- #
+ONTOLOGY_INDEX_DIR = CACHE_DIR + "/ontologies"
+ONTOLOGY_INDEX_TTL = 30 * 86400
+ONTOLOGY_HARVEST_PAGE_SIZE = 50000
+# Seconds allowed per harvested page
+ONTOLOGY_HARVEST_TIMEOUT = 600.0
+_RDFS = "http://www.w3.org/2000/01/rdf-schema#"
+_OBO_IN_OWL = "http://www.geneontology.org/formats/oboInOwl#"
+_SKOS = "http://www.w3.org/2004/02/skos/core#"
+_OBO_SYNONYMS = {
+    _RDFS + "label": LABEL,
+    _OBO_IN_OWL + "hasExactSynonym": EXACT,
+    _OBO_IN_OWL + "hasRelatedSynonym": RELATED,
+    _OBO_IN_OWL + "hasNarrowSynonym": RELATED,
+    _OBO_IN_OWL + "hasBroadSynonym": RELATED,
+}
+# Term IRI prefix, term ID prefix and label/synonym properties of each ontology;
+# the graphs come from the MIE schema_info
+ONTOLOGIES = {
+    "chebi": {"iri_prefix": "http://purl.obolibrary.org/obo/CHEBI_", "id_prefix": "CHEBI:", "properties": _OBO_SYNONYMS},
+    "go": {"iri_prefix": "http://purl.obolibrary.org/obo/GO_", "id_prefix": "GO:", "properties": _OBO_SYNONYMS},
+    "mondo": {"iri_prefix": "http://purl.obolibrary.org/obo/MONDO_", "id_prefix": "MONDO:", "properties": _OBO_SYNONYMS},
+    "nando": {
+        "iri_prefix": "http://nanbyodata.jp/ontology/NANDO_",
+        "id_prefix": "NANDO:",
+        "properties": {_RDFS + "label": LABEL, _SKOS + "prefLabel": EXACT, _SKOS + "altLabel": RELATED},
+    },
+}
+
+_term_indexes: Dict[str, tuple] = {}
+_term_harvests: Dict[str, asyncio.Task] = {}
+# One ontology harvest at a time, independent of the label harvests
+_term_harvest_lock = asyncio.Lock()
+
+
+def _term_index_path(dbname: str) -> str:
+    return os.path.join(ONTOLOGY_INDEX_DIR, f"{dbname}.terms")
+
+
+async def harvest_ontology_terms(dbname: str) -> int:
+    """Harvest the labels and synonyms of `dbname` into its term index file.
+
+    Each label or synonym property is read in pages of
+    ONTOLOGY_HARVEST_PAGE_SIZE rows; deprecated terms are left out.
+
+    Returns:
+        The number of terms written.
+    """
+    ontology = ONTOLOGIES[dbname]
+    iri_prefix, id_prefix = ontology["iri_prefix"], ontology["id_prefix"]
+    graphs = _load_mie(dbname).get("schema_info", {}).get("graphs") or []
+    from_clauses = "\n".join(f"FROM <{graph}>" for graph in graphs)
+    entries = []
+    for prop, kind in ontology["properties"].items():
+        offset = 0
+        while True:
+            query = f"""SELECT ?term ?text
+{from_clauses}
+WHERE {{
+  ?term <{prop}> ?text .
+  FILTER(STRSTARTS(STR(?term), "{iri_prefix}"))
+  FILTER NOT EXISTS {{ ?term <http://www.w3.org/2002/07/owl#deprecated> ?deprecated FILTER(STR(?deprecated) IN ("true", "1")) }}
+}}
+LIMIT {ONTOLOGY_HARVEST_PAGE_SIZE} OFFSET {offset}"""
+            text = await execute_sparql(query, dbname, timeout=ONTOLOGY_HARVEST_TIMEOUT)
+            page = list(csv.reader(io.StringIO(text)))[1:]
+            entries.extend((id_prefix + term[len(iri_prefix):], label, kind) for term, label in page)
+            if len(page) < ONTOLOGY_HARVEST_PAGE_SIZE:
+                break
+            offset += ONTOLOGY_HARVEST_PAGE_SIZE
+    os.makedirs(ONTOLOGY_INDEX_DIR, exist_ok=True)
+    return write_term_index(_term_index_path(dbname), entries)
+
+
+async def _harvest_terms_in_background(dbname: str) -> None:
+    try:
+        async with _term_harvest_lock:
+            count = await harvest_ontology_terms(dbname)
+        logger.info(f"Term index for {dbname}: {count} terms")
+    except (httpx.HTTPError, OSError, ValueError) as e:
+        logger.warning(f"Term harvest for {dbname} failed: {e}")
+    finally:
+        _term_harvests.pop(dbname, None)
+
+
+def get_term_index(dbname: str) -> Optional[TermIndex]:
+    """Return the term index of `dbname`, or None while it is being built.
+
+    The index file is memory-mapped, so opening it is immediate. A missing
+    or outdated file starts a background harvest; an outdated index is
+    still served until the new one is written.
+    """
+    path = _term_index_path(dbname)
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        mtime = None
+    if (mtime is None or time.time() - mtime > ONTOLOGY_INDEX_TTL) and dbname not in _term_harvests:
+        _term_harvests[dbname] = asyncio.create_task(_harvest_terms_in_background(dbname))
+    if mtime is None:
+        return None
+    cached = _term_indexes.get(dbname)
+    if cached is None or cached[0] != mtime:
+        try:
+            cached = (mtime, TermIndex(path))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not open term index {path}: {e}")
+            return None
+        _term_indexes[dbname] = cached
+    return cached[1]
+
+
+@mcp.tool(
+        enabled=True,
+        name="search_ontology_terms",
+        description="Search ChEBI, GO, MONDO or NANDO terms by name, synonym or ID, answered from a local index."
+)
+async def search_ontology_terms(
+    dbname: Annotated[str, Field(description=f"One of: {', '.join(ONTOLOGIES)}")],
+    keyword: Annotated[str, Field(description="Term name or synonym (the last word may be a prefix), or a term ID such as 'GO:0006915'.")],
+    limit: Annotated[int, Field(description="Maximum number of hits.")] = 20
+) -> Dict[str, Any]:
+    """
+    Search the terms of an ontology from the local term index.
+
+    Exact name matches rank first, then matches on the term label before
+    exact and other synonyms, then shorter names. The index is built in
+    the background on first use (or with `togo-mcp-build ontology-index`).
+
+    Returns:
+        dict: {"dbname", "status", "hits"} with hits as {"id", "iri", "label"}
+            plus "matched_synonym" when a synonym matched; status is "ok",
+            or "building" while the index is not yet available.
+    """
+    toolcall_log("search_ontology_terms")
+    if dbname not in ONTOLOGIES:
+        raise ValueError(f"No term index for '{dbname}'. Available: {', '.join(ONTOLOGIES)}")
+    index = get_term_index(dbname)
+    if index is None:
+        return {"dbname": dbname, "status": "building",
+                "message": "The term index is being built; use run_sparql meanwhile and try again later."}
+    ontology = ONTOLOGIES[dbname]
+    term_id = keyword.strip().upper().replace("_", ":", 1)
+    if term_id.startswith(ontology["id_prefix"]) and term_id[len(ontology["id_prefix"]):].isdigit():
+        hit = index.lookup_id(term_id)
+        hits = [hit] if hit else []
+    else:
+        hits = index.search(keyword, limit)
+    for hit in hits:
+        hit["iri"] = ontology["iri_prefix"] + hit["id"][len(ontology["id_prefix"]):]
+    return {"dbname": dbname, "status": "ok", "hits": hits}
+
+
+# --- Keyword search compiled from the universal SPARQL template --- #
+KW_SEARCH_CACHE_TTL = 3600
+# Properties searched with bif:contains (one UNION branch each)
+KW_SEARCH_MAX_PROPERTIES = 3
+# Endpoints that reject bif:contains inside UNION; only the first label property is searched
+KW_SEARCH_NO_UNION_ENDPOINTS = {"sib"}
+
+_kw_search_results = TTLCache("kw_search_sparql", maxsize=512, ttl=KW_SEARCH_CACHE_TTL)
+_ENTITY_TYPE = re.compile(r"\?(\w+)\s+a\s+([\w-]*:[\w-]+)")
+_CONSTANT_TRIPLE = re.compile(r"^(?:\?(\w+)\s+)?([\w-]*:[\w-]+)\s+(\d+|true|false)\s*[;.]")
+_IRI_PREFIX_FILTER = re.compile(r'FILTER\s*\(\s*STRSTARTS\s*\(\s*STR\s*\(\s*\?(\w+)\s*\)\s*,\s*"([^"]+)"\s*\)\s*\)')
+_KW_WORD = re.compile(r"\w+\*?")
+
+
+def _local_name(iri: str) -> str:
+    return re.split(r"[#/:]", iri)[-1]
+
+
+def _critical_filters(mie: Dict[str, Any], class_iri: str) -> List[str]:
+    """Return the entity constraints that the MIE anti-patterns add in their correct queries.
+
+    Only patterns on the entity variable of `class_iri` are taken: a
+    property with a numeric or boolean value (e.g. `up:reviewed 1`) and an
+    IRI namespace filter (`FILTER(STRSTARTS(STR(?entity), ...))`).
+    """
+    filters = []
+    for anti_pattern in mie.get("anti_patterns") or []:
+        correct = anti_pattern.get("correct_sparql") or ""
+        wrong_lines = {line.strip() for line in (anti_pattern.get("wrong_sparql") or "").splitlines()}
+        entity_vars = {var for var, cls in _ENTITY_TYPE.findall(correct) if _local_name(cls) == _local_name(class_iri)}
+        if not entity_vars:
+            continue
+        prefixes = declared_prefixes(mie.get("shape_expressions", "") + "\n" + correct)
+        for line in correct.splitlines():
+            line = line.strip()
+            if line in wrong_lines:
+                continue
+            triple = _CONSTANT_TRIPLE.match(line)
+            if triple and (triple.group(1) is None or triple.group(1) in entity_vars):
+                prop = expand_curie(triple.group(2), prefixes)
+                if prop:
+                    filters.append(f"?entity <{prop}> {triple.group(3)} .")
+            for var, prefix in _IRI_PREFIX_FILTER.findall(line):
+                if var in entity_vars:
+                    filters.append(f'FILTER(STRSTARTS(STR(?entity), "{prefix}"))')
+    return list(dict.fromkeys(filters))
+
+
+@lru_cache(maxsize=None)
+def _kw_search_query(dbname: str) -> Template:
+    """Instantiate resources/kwsearch_sparql_template.md for `dbname`.
+
+    The entity class and its label properties come from the first MIE shape
+    with labels, the graphs from schema_info and the critical filters from
+    the anti-patterns. The result is a query with $keyword and $limit left
+    to fill in.
+    """
+    try:
+        mie = _load_mie(dbname)
+    except (OSError, yaml.YAMLError) as e:
+        raise ValueError(f"The MIE file of {dbname} could not be read: {e}")
+    targets = _label_targets(dbname)
+    if not targets:
+        raise ValueError(f"The MIE shapes of {dbname} define no label properties; use run_sparql.")
+    class_iri, properties = targets[0]
+    if SPARQL_ENDPOINT[dbname]["endpoint_name"] in KW_SEARCH_NO_UNION_ENDPOINTS:
+        properties = properties[:1]
+    properties = properties[:KW_SEARCH_MAX_PROPERTIES]
+    graphs = mie.get("schema_info", {}).get("graphs") or []
+    from_clauses = "".join(f"FROM <{graph}>\n" for graph in graphs)
+    filters = "".join(f"  {f}\n" for f in _critical_filters(mie, class_iri))
+    branches = "\n  UNION\n".join(
+        f"""  {{
+    ?entity <{prop}> ?text{i} .
+    ?text{i} bif:contains "$keyword" option (score ?sc{i}) .
+  }}""" for i, prop in enumerate(properties, 1)
+    )
+    total = " + ".join(f"COALESCE(MAX(?sc{i}), 0)" for i in range(1, len(properties) + 1))
+    query = f"""SELECT ?entity (SAMPLE(?name) AS ?label) ({total} AS ?totalScore)
+{from_clauses}WHERE {{
+  ?entity a <{class_iri}> ;
+          <{properties[0]}> ?name .
+{filters}{branches}
+}}
+GROUP BY ?entity
+ORDER BY DESC(?totalScore)
+LIMIT $limit"""
+    return Template(query)
+
+
+def _kw_expression(keyword: str) -> str:
+    """Turn free text into a bif:contains expression requiring every word.
+
+    A trailing * is kept as a wildcard when at least four characters precede
+    it, as Virtuoso requires.
+    """
+    words = [w if not w.endswith("*") or len(w) > 4 else w[:-1] for w in _KW_WORD.findall(keyword)]
+    if not words:
+        raise ValueError("The keyword must contain at least one word.")
+    return " AND ".join(f"'{w}'" for w in words)
+
+
+@mcp.tool(
+        enabled=True,
+        name="kw_search_sparql",
+        description="Keyword search of an RDF database with bif:contains, using a query compiled from the database's MIE file."
+)
+async def kw_search_sparql(
+    dbname: Annotated[str, Field(description=DBNAME_DESCRIPTION)],
+    keyword: Annotated[str, Field(description="Words that must all occur in the entity labels; 'word*' is a prefix (4+ characters).")],
+    limit: Annotated[int, Field(description="Maximum number of hits.")] = 20
+) -> Dict[str, Any]:
+    """
+    Search entity labels of a database with the universal keyword search template.
+
+    The template in resources/kwsearch_sparql_template.md is instantiated
+    once per database from its MIE file (entity class, label properties,
+    graphs and critical filters such as `up:reviewed 1`), so no query has
+    to be written by hand. Results are cached for an hour.
+
+    Returns:
+        dict: {"dbname", "query", "hits"} with hits as {"iri", "label", "score"};
+            "query" is the executed SPARQL, to adapt with run_sparql if needed.
+    """
+    toolcall_log("kw_search_sparql")
+    if dbname not in SPARQL_ENDPOINT:
+        raise ValueError(f"Unknown database: {dbname}. Valid databases are: {', '.join(SPARQL_ENDPOINT_KEYS)}")
+    query = _kw_search_query(dbname).safe_substitute(keyword=_kw_expression(keyword), limit=int(limit))
+    key = (dbname, query)
+    hits = _kw_search_results.peek(key)
+    _kw_search_results.record(dbname, hits is not None)
+    if hits is None:
+        text = await execute_sparql(query, dbname)
+        hits = [{"iri": row["entity"], "label": row["label"], "score": row["totalScore"]}
+                for row in csv.DictReader(io.StringIO(text))]
+        _kw_search_results.set(key, hits)
+    return {"dbname": dbname, "query": query, "hits": hits}
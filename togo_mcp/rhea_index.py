@@ -0,0 +1,114 @@
+"""
+In-memory Rhea reaction index for keyword, ChEBI and EC lookups.
+
+Rhea holds a few tens of thousands of reactions, so the whole set is
+kept in memory: equations in a list, and postings (sorted reaction
+positions) per equation word, per ChEBI ID and per EC number. A keyword
+lookup intersects the postings of its words, starting from the shortest.
+
+The index is built from four tab-separated columns (Rhea ID, equation,
+ChEBI IDs, EC numbers; list columns separated by ';'), as returned by the
+Rhea REST API with columns=rhea-id,equation,chebi-id,ec.
+"""
+
+import bisect
+import re
+from typing import Dict, Iterable, List, Tuple
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _words(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+class RheaIndex:
+    """Rhea reactions with word, ChEBI and EC postings.
+
+    Args:
+        reactions: (Rhea ID, equation, ChEBI IDs, EC numbers) tuples.
+    """
+
+    def __init__(self, reactions: Iterable[Tuple[str, str, List[str], List[str]]]):
+        self.ids: List[str] = []
+        self.equations: List[str] = []
+        self.words: Dict[str, List[int]] = {}
+        self.chebi: Dict[str, List[int]] = {}
+        self.ec: Dict[str, List[int]] = {}
+        for rhea_id, equation, chebi_ids, ec_numbers in sorted(reactions, key=lambda r: _rhea_number(r[0])):
+            i = len(self.ids)
+            self.ids.append(rhea_id)
+            self.equations.append(equation)
+            for word in set(_words(equation)):
+                self.words.setdefault(word, []).append(i)
+            for chebi_id in set(chebi_ids):
+                self.chebi.setdefault(chebi_id.upper(), []).append(i)
+            for ec in set(ec_numbers):
+                self.ec.setdefault(_ec_key(ec), []).append(i)
+        self._ec_keys = sorted(self.ec)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_tsv(cls, lines: Iterable[str]) -> "RheaIndex":
+        """Build an index from TSV lines; the first line is a header."""
+        def reactions():
+            rows = iter(lines)
+            next(rows, None)
+            for line in rows:
+                fields = line.rstrip("\r\n").split("\t")
+                if len(fields) < 2 or not fields[0]:
+                    continue
+                chebi_ids = fields[2].split(";") if len(fields) > 2 and fields[2] else []
+                ec_numbers = fields[3].split(";") if len(fields) > 3 and fields[3] else []
+                yield fields[0], fields[1], chebi_ids, ec_numbers
+        return cls(reactions())
+
+    def _rows(self, positions: Iterable[int], limit: int) -> List[Dict[str, str]]:
+        results = []
+        for i in positions:
+            results.append({"rhea_id": self.ids[i], "equation": self.equations[i]})
+            if len(results) >= limit:
+                break
+        return results
+
+    def search(self, query: str, limit: int = 100) -> List[Dict[str, str]]:
+        """Return reactions whose equation contains every word of `query`."""
+        words = set(_words(query))
+        if not words:
+            return self._rows(range(len(self.ids)), limit)
+        postings = sorted((self.words.get(word, []) for word in words), key=len)
+        matches = set(postings[0])
+        for posting in postings[1:]:
+            matches.intersection_update(posting)
+            if not matches:
+                break
+        return self._rows(sorted(matches), limit)
+
+    def by_chebi(self, chebi_id: str, limit: int = 100) -> List[Dict[str, str]]:
+        """Return reactions with `chebi_id` (e.g. "CHEBI:15422") as a participant."""
+        return self._rows(self.chebi.get(chebi_id.upper(), []), limit)
+
+    def by_ec(self, ec: str, limit: int = 100) -> List[Dict[str, str]]:
+        """Return reactions for an EC number; "2.7.11" or "2.7.11.-" matches the whole sub-subclass."""
+        key = _ec_key(ec).rstrip(".-")
+        exact = self.ec.get(key)
+        if exact is not None:
+            return self._rows(exact, limit)
+        positions = set()
+        for ec_key in self._ec_keys[bisect.bisect_left(self._ec_keys, key + "."):]:
+            if not ec_key.startswith(key + "."):
+                break
+            positions.update(self.ec[ec_key])
+        return self._rows(sorted(positions), limit)
+
+
+def _ec_key(ec: str) -> str:
+    ec = ec.strip()
+    return ec[3:] if ec.upper().startswith("EC:") else ec
+
+
+def _rhea_number(rhea_id: str) -> int:
+    digits = rhea_id.rpartition(":")[2]
+    return int(digits) if digits.isdigit() else 0
@@ -1,11 +1,14 @@
 from fastmcp import FastMCP
+from contextlib import asynccontextmanager
 import csv
 from typing import Dict
 import os
 import httpx
 import logging
 from starlette.requests import Request
-from starlette.responses import PlainTextResponse,HTMLResponse
+from starlette.responses import PlainTextResponse,HTMLResponse,JSONResponse
+from .cache import cache_stats
+from .clients import close_clients, get_client
 
 
 # Set up logging
@@ -32,6 +35,8 @@ RDF_CONFIG_TEMPLATE= CWD + "/rdf-config/template.yaml"
 ENDPOINTS_CSV = CWD + "/resources/endpoints.csv"
 INDEX_HTML = CWD + "/docs/togomcp-intro.html"
 KW_SEARCH_INSTRUCTIONS = CWD + "/kw_search"
+# Snapshots and local indexes built at runtime
+CACHE_DIR = os.getenv("TOGOMCP_CACHE_DIR", CWD + "/cache")
 
 
 
@@ -120,7 +125,8 @@ async def execute_sparql(
     sparql_query: str,
     dbname: str = None,
     endpoint_name: str = None,
-    endpoint_url: str = None
+    endpoint_url: str = None,
+    timeout: float = None
 ) -> str:
     """Execute a SPARQL query on RDF Portal.
 
@@ -129,6 +135,8 @@ async def execute_sparql(
         dbname: The name of the database to query (e.g., 'chembl', 'uniprot').
         endpoint_name: Short endpoint name (e.g., 'ebi', 'sib') for cross-database queries.
         endpoint_url: Direct SPARQL endpoint URL.
+        timeout: Seconds to wait for the response; default is httpx's 5 s.
+            Long-running queries (index harvests, graph probes) pass their own.
 
     Returns:
         The results of the SPARQL query in CSV format.
@@ -139,20 +147,32 @@ async def execute_sparql(
     """
     url = resolve_endpoint_url(dbname, endpoint_name, endpoint_url)
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            url, data={"query": sparql_query}, headers={"Accept": "text/csv"}
-        )
+    response = await get_client(url).post(
+        url, data={"query": sparql_query}, headers={"Accept": "text/csv"},
+        timeout=httpx.USE_CLIENT_DEFAULT if timeout is None else timeout
+    )
     response.raise_for_status()
     return response.text
 
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    """Close the shared HTTP clients when the server shuts down."""
+    try:
+        yield {}
+    finally:
+        await close_clients()
+
 # The Primary MCP server
-mcp = FastMCP("TogoMCP: RDF Portal MCP Server")
+mcp = FastMCP("TogoMCP: RDF Portal MCP Server", lifespan=lifespan)
 
 @mcp.custom_route("/health", methods=["GET"])
 async def health_check(request: Request) -> PlainTextResponse:
     return PlainTextResponse("OK")
 
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request: Request) -> JSONResponse:
+    return JSONResponse({"caches": cache_stats()})
+
 @mcp.custom_route("/", methods=["GET"])
 async def index(request: Request) -> HTMLResponse:
     with open(INDEX_HTML, 'r') as f:
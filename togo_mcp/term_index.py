@@ -0,0 +1,271 @@
+"""
+Memory-mapped ontology term index (labels, synonyms, IDs).
+
+One file per ontology holds every term label and synonym with a word
+index over them, in flat arrays that are memory-mapped on open, so
+loading an index costs no parsing however large the ontology is. Layout
+(unsigned integers in native byte order; 32-bit arrays are padded to
+8 bytes):
+
+    magic "TGTERM01" | n_terms | n_entries | n_words | n_postings   (u64)
+    term_offsets[n_terms + 1]      (u64) term ID blob, IDs sorted bytewise
+    term_labels[n_terms]           (u32) entry holding each term's label
+    entry_terms[n_entries]         (u32) term of each entry | kind << 30
+    entry_offsets[n_entries + 1]   (u64) label blob
+    word_offsets[n_words + 1]      (u64) word blob, words sorted bytewise
+    posting_starts[n_words + 1]    (u64) first posting of each word
+    postings[n_postings]           (u32) entries containing each word
+    term ID blob | label blob | word blob
+
+An entry's kind is LABEL, EXACT (exact synonym) or RELATED (any other
+synonym); searches rank labels first, then exact synonyms.
+"""
+
+import mmap
+import os
+import struct
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .word_index import prefix_expansions, ranked_unique, words
+
+MAGIC = b"TGTERM01"
+_HEADER = struct.Struct("=8sQQQQ")
+LABEL, EXACT, RELATED = 0, 1, 2
+_KIND_SHIFT = 30
+_TERM_MASK = (1 << _KIND_SHIFT) - 1
+_NO_LABEL = 0xFFFFFFFF
+
+
+def _padded(values: array) -> bytes:
+    data = values.tobytes()
+    return data + b"\0" * (-len(data) % 8)
+
+
+def write_term_index(path: str, entries: Iterable[Tuple[str, str, int]]) -> int:
+    """Write (term ID, label or synonym, kind) entries to an index file.
+
+    Returns:
+        The number of distinct terms written.
+    """
+    labels: Dict[str, Dict[Tuple[str, int], None]] = {}
+    for term_id, text, kind in entries:
+        text = " ".join(text.split())
+        if term_id and text:
+            labels.setdefault(term_id, {})[(text, kind)] = None
+    term_ids = sorted(labels, key=lambda t: t.encode("utf-8"))
+
+    term_offsets = array("Q", [0])
+    term_labels = array("I")
+    entry_terms = array("I")
+    entry_offsets = array("Q", [0])
+    label_blob: List[bytes] = []
+    postings: Dict[bytes, List[int]] = {}
+    for t, term_id in enumerate(term_ids):
+        term_offsets.append(term_offsets[-1] + len(term_id.encode("utf-8")))
+        label_entry = _NO_LABEL
+        # Labels first, then exact and related synonyms
+        for text, kind in sorted(labels[term_id], key=lambda e: e[1]):
+            e = len(entry_terms)
+            if kind == LABEL and label_entry == _NO_LABEL:
+                label_entry = e
+            entry_terms.append(t | (kind << _KIND_SHIFT))
+            data = text.encode("utf-8")
+            label_blob.append(data)
+            entry_offsets.append(entry_offsets[-1] + len(data))
+            for word in set(words(text)):
+                postings.setdefault(word.encode("utf-8"), []).append(e)
+        term_labels.append(label_entry)
+
+    vocabulary = sorted(postings)
+    word_offsets = array("Q", [0])
+    posting_starts = array("Q", [0])
+    all_postings = array("I")
+    for word in vocabulary:
+        word_offsets.append(word_offsets[-1] + len(word))
+        all_postings.extend(postings[word])
+        posting_starts.append(len(all_postings))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(term_ids), len(entry_terms), len(vocabulary), len(all_postings)))
+        f.write(term_offsets.tobytes())
+        f.write(_padded(term_labels))
+        f.write(_padded(entry_terms))
+        f.write(entry_offsets.tobytes())
+        f.write(word_offsets.tobytes())
+        f.write(posting_starts.tobytes())
+        f.write(_padded(all_postings))
+        f.write(b"".join(t.encode("utf-8") for t in term_ids))
+        f.write(b"".join(label_blob))
+        f.write(b"".join(vocabulary))
+    os.replace(tmp_path, path)
+    return len(term_ids)
+
+
+class TermIndex:
+    """Read-only view of a file written by `write_term_index`."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n_terms, n_entries, n_words, n_postings = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a term index: {path}")
+        view = memoryview(self._mm)
+        pos = _HEADER.size
+
+        def take(count: int, fmt: str):
+            nonlocal pos
+            size = count * (8 if fmt == "Q" else 4)
+            part = view[pos:pos + size].cast(fmt)
+            pos += size + (-size % 8)
+            return part
+
+        self._term_offsets = take(n_terms + 1, "Q")
+        self._term_labels = take(n_terms, "I")
+        self._entry_terms = take(n_entries, "I")
+        self._entry_offsets = take(n_entries + 1, "Q")
+        self._word_offsets = take(n_words + 1, "Q")
+        self._posting_starts = take(n_words + 1, "Q")
+        self._postings = take(n_postings, "I")
+        self._term_base = pos
+        self._label_base = pos + self._term_offsets[n_terms]
+        self._word_base = self._label_base + self._entry_offsets[n_entries]
+        self._n_terms = n_terms
+        self._n_words = n_words
+
+    def __len__(self) -> int:
+        return self._n_terms
+
+    def _term_id(self, t: int) -> str:
+        base, offsets = self._term_base, self._term_offsets
+        return self._mm[base + offsets[t]:base + offsets[t + 1]].decode("utf-8")
+
+    def _text(self, e: int) -> str:
+        base, offsets = self._label_base, self._entry_offsets
+        return self._mm[base + offsets[e]:base + offsets[e + 1]].decode("utf-8")
+
+    def _word(self, w: int) -> bytes:
+        base, offsets = self._word_base, self._word_offsets
+        return self._mm[base + offsets[w]:base + offsets[w + 1]]
+
+    def _bisect_word(self, target: bytes, lo: int = 0) -> int:
+        hi = self._n_words
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._word(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _posting(self, w: int) -> memoryview:
+        return self._postings[self._posting_starts[w]:self._posting_starts[w + 1]]
+
+    def _word_entries(self, word: str, prefix: bool) -> set:
+        target = word.encode("utf-8")
+        w = self._bisect_word(target)
+        if not prefix:
+            return set(self._posting(w)) if w < self._n_words and self._word(w) == target else set()
+        # No UTF-8 byte is 0xFF, so every word starting with the prefix sorts below this
+        stop = self._bisect_word(target + b"\xff", w)
+        exact = w < stop and self._word(w) == target
+        starts = self._posting_starts
+        entries = set()
+        for w in prefix_expansions(w, stop, lambda w: starts[w + 1] - starts[w], exact):
+            entries.update(self._posting(w))
+        return entries
+
+    def _hit(self, e: Optional[int], t: int) -> Dict[str, str]:
+        label_entry = self._term_labels[t]
+        hit = {"id": self._term_id(t)}
+        hit["label"] = self._text(label_entry) if label_entry != _NO_LABEL else None
+        if e is not None and e != label_entry:
+            hit["matched_synonym"] = self._text(e)
+        return hit
+
+    def lookup_id(self, term_id: str) -> Optional[Dict[str, str]]:
+        """Return the term with ID `term_id` (e.g. "GO:0006915"), or None."""
+        target = term_id.encode("utf-8")
+        lo, hi = 0, self._n_terms
+        base, offsets = self._term_base, self._term_offsets
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._mm[base + offsets[mid]:base + offsets[mid + 1]] < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._n_terms and self._term_id(lo) == term_id:
+            return self._hit(None, lo)
+        return None
+
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, str]]:
+        """Return terms whose label or a synonym contains every word of `query`.
+
+        The last word may be a prefix. Exact (case-insensitive) matches rank
+        first, then labels before exact and related synonyms, then shorter
+        texts. Each term is returned once, with the synonym that matched.
+        """
+        query_words = words(query)
+        if not query_words:
+            return []
+        *complete, last = query_words
+        matches = None
+        for word in sorted(set(complete), key=len, reverse=True):
+            entries = self._word_entries(word, prefix=False)
+            matches = entries if matches is None else matches & entries
+            if not matches:
+                return []
+        last_entries = self._word_entries(last, prefix=True)
+        matches = last_entries if matches is None else matches & last_entries
+
+        query_text = " ".join(query.split()).casefold()
+        query_size = len(query_text.encode("utf-8"))
+        entry_terms, offsets = self._entry_terms, self._entry_offsets
+
+        def rank(e):
+            size = offsets[e + 1] - offsets[e]
+            exact = size == query_size and self._text(e).casefold() == query_text
+            return (not exact, entry_terms[e] >> _KIND_SHIFT, size, e)
+
+        # A term may match through several synonyms, so over-fetch more than labels do
+        ranked = ranked_unique(matches, rank, lambda e: entry_terms[e] & _TERM_MASK, limit, overfetch=3)
+        return [self._hit(e, entry_terms[e] & _TERM_MASK) for e in ranked]
+
+
+def read_obo(path: str, id_prefix: str) -> Iterator[Tuple[str, str, int]]:
+    """Stream (term ID, text, kind) entries from an OBO file.
+
+    Only [Term] stanzas whose ID starts with `id_prefix` (e.g. "GO:") are
+    read; obsolete terms are skipped.
+    """
+    def stanza_entries(stanza):
+        if stanza.get("obsolete") or not stanza.get("id", "").startswith(id_prefix):
+            return []
+        return stanza["entries"]
+
+    stanza = None
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line.startswith("["):
+                if stanza:
+                    yield from ((stanza["id"], text, kind) for text, kind in stanza_entries(stanza))
+                stanza = {"entries": []} if line == "[Term]" else None
+                continue
+            if stanza is None or ": " not in line:
+                continue
+            tag, _, value = line.partition(": ")
+            if tag == "id":
+                stanza["id"] = value.strip()
+            elif tag == "name":
+                stanza["entries"].append((value.strip(), LABEL))
+            elif tag == "synonym" and value.startswith('"'):
+                text, _, scope = value[1:].partition('" ')
+                stanza["entries"].append((text.replace('\\"', '"'), EXACT if scope.startswith("EXACT") else RELATED))
+            elif tag == "is_obsolete" and value.strip() == "true":
+                stanza["obsolete"] = True
+    if stanza:
+        yield from ((stanza["id"], text, kind) for text, kind in stanza_entries(stanza))
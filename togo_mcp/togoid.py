@@ -1,41 +1,596 @@
 from .server import *
+from .cache import TTLCache
+from .clients import get_client
+from .idtable import IdTable, write_table
+import asyncio
+import json
+import re
+import time
+import uuid
 import httpx
+from typing import Dict, Iterable, List, Optional, Tuple
 
-_client = httpx.AsyncClient(base_url="https://api.togoid.dbcls.jp")
+TOGOID_API = "https://api.togoid.dbcls.jp"
 togoid_mcp = FastMCP("TogoID API server")
 
+# The /convert endpoint returns at most this many rows per request.
+CONVERT_PAGE_SIZE = 10000
+# Maximum number of concurrent requests to api.togoid.dbcls.jp
+TOGOID_MAX_CONCURRENCY = 4
+# Larger auto-paginated results are stored and returned as a handle.
+INLINE_RESULT_LIMIT = 20000
+# IDs are sent in the query string; longer ID lists are split into chunks
+# whose `ids=` value stays below this many characters.
+MAX_IDS_PARAM_LENGTH = 4000
+
+# Configuration documents (/config/...) are refreshed in the background
+# once they are older than this many seconds.
+CONFIG_TTL = 86400.0
+CONFIG_SNAPSHOT = CACHE_DIR + "/togoid_config.json"
+
+_semaphore = asyncio.Semaphore(TOGOID_MAX_CONCURRENCY)
+_result_store = TTLCache("togoid_results", maxsize=32, ttl=3600.0)
+
+# path -> {"fetched_at": epoch seconds, "data": JSON document}
+_config_cache: dict = {}
+_config_refreshing: set = set()
+# Running refresh tasks; the event loop keeps only weak references to tasks
+_config_refresh_tasks: set = set()
+_config_snapshot_loaded = False
+
+
+def _load_config_snapshot() -> None:
+    """Fill the configuration cache from the on-disk snapshot (once)."""
+    global _config_snapshot_loaded
+    if _config_snapshot_loaded:
+        return
+    _config_snapshot_loaded = True
+    try:
+        with open(CONFIG_SNAPSHOT, "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return
+    for path, entry in snapshot.items():
+        _config_cache.setdefault(path, entry)
+
+
+def _save_config_snapshot() -> None:
+    """Write the configuration cache to disk for the next cold start."""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_file = CONFIG_SNAPSHOT + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(_config_cache, f)
+        os.replace(tmp_file, CONFIG_SNAPSHOT)
+    except OSError as e:
+        logger.warning(f"Could not save TogoID config snapshot: {e}")
+
+
+async def _fetch_config(path: str):
+    """Fetch a configuration document and update the cache and snapshot."""
+    response = await get_client(TOGOID_API).get(TOGOID_API + path)
+    response.raise_for_status()
+    data = response.json()
+    _config_cache[path] = {"fetched_at": time.time(), "data": data}
+    _save_config_snapshot()
+    return data
+
+
+async def _refresh_config(path: str) -> None:
+    try:
+        await _fetch_config(path)
+    except (httpx.HTTPError, ValueError) as e:
+        logger.warning(f"Background refresh of TogoID {path} failed: {e}")
+    finally:
+        _config_refreshing.discard(path)
+
+
+async def _get_config(path: str):
+    """Return a TogoID configuration document.
+
+    Served from memory (or the snapshot on a cold start). Documents older
+    than CONFIG_TTL are still returned while a background task refreshes
+    them; only a document that was never fetched blocks on the network.
+    """
+    _load_config_snapshot()
+    entry = _config_cache.get(path)
+    if entry is None:
+        return await _fetch_config(path)
+    if time.time() - entry["fetched_at"] > CONFIG_TTL and path not in _config_refreshing:
+        _config_refreshing.add(path)
+        task = asyncio.create_task(_refresh_config(path))
+        _config_refresh_tasks.add(task)
+        task.add_done_callback(_config_refresh_tasks.discard)
+    return entry["data"]
+
+
+# Directed dataset graph built from /config/relation:
+# source -> {target: True if the relation is defined in this direction}
+_relation_graph: dict = {"relations": None, "graph": {}}
+
+
+def _build_relation_graph(relations: dict) -> Dict[str, Dict[str, bool]]:
+    """Build the dataset adjacency map from the relation configuration.
+
+    Relation keys are "<source>-<target>". TogoID converts along a relation
+    in both directions, so each relation also adds a reverse edge.
+    """
+    graph: Dict[str, Dict[str, bool]] = {}
+    for key in relations:
+        source, _, target = key.partition("-")
+        if not source or not target:
+            continue
+        graph.setdefault(source, {})[target] = True
+        graph.setdefault(target, {}).setdefault(source, False)
+    return graph
+
+
+async def _get_relation_graph() -> Dict[str, Dict[str, bool]]:
+    """Return the relation graph, rebuilding it when the relation document changes."""
+    relations = await _get_config("/config/relation")
+    if _relation_graph["relations"] is not relations:
+        _relation_graph["graph"] = _build_relation_graph(relations)
+        _relation_graph["relations"] = relations
+    return _relation_graph["graph"]
+
+
+def _plan_routes(
+    graph: Dict[str, Dict[str, bool]],
+    source: str,
+    target: str,
+    max_hops: int = 3,
+    max_routes: int = 10,
+) -> List[dict]:
+    """Find routes from `source` to `target` with at most `max_hops` hops.
+
+    Routes are ranked by hop count, then by the number of hops that use a
+    relation against its defined direction (fewer is better).
+    """
+    if source not in graph or target not in graph:
+        return []
+
+    # Hop distance to the target (edges exist in both directions).
+    distance = {target: 0}
+    frontier = [target]
+    while frontier:
+        next_frontier = []
+        for node in frontier:
+            for neighbor in graph[node]:
+                if neighbor not in distance:
+                    distance[neighbor] = distance[node] + 1
+                    next_frontier.append(neighbor)
+        frontier = next_frontier
+    if distance.get(source, max_hops + 1) > max_hops:
+        return []
+
+    routes = []
+
+    def extend(path: List[str], reverse_hops: int) -> None:
+        node = path[-1]
+        if node == target:
+            routes.append((len(path) - 1, reverse_hops, path))
+            return
+        remaining = max_hops - (len(path) - 1)
+        for neighbor, forward in graph[node].items():
+            if neighbor not in path and distance.get(neighbor, remaining) < remaining:
+                extend(path + [neighbor], reverse_hops + (0 if forward else 1))
+
+    extend([source], 0)
+    routes.sort(key=lambda r: (r[0], r[1], r[2]))
+    return [
+        {"route": ",".join(path), "hops": hops, "reverse_hops": reverse_hops}
+        for hops, reverse_hops, path in routes[:max_routes]
+    ]
+
+
+async def _check_route(route: str) -> Optional[str]:
+    """Return an error message if `route` is not a valid path, else None.
+
+    Validation is skipped (None) when the relation configuration cannot be
+    loaded, so conversions still work without it.
+    """
+    try:
+        graph = await _get_relation_graph()
+    except httpx.HTTPError:
+        return None
+    if not graph:
+        return None
+    datasets = [d.strip() for d in route.split(",")]
+    unknown = [d for d in datasets if d not in graph]
+    if unknown:
+        return f"Unknown dataset(s) in route '{route}': {', '.join(unknown)}. Use getAllDataset to list datasets."
+    for source, target in zip(datasets, datasets[1:]):
+        if target not in graph[source]:
+            suggestions = [r["route"] for r in _plan_routes(graph, datasets[0], datasets[-1], max_routes=3)]
+            hint = f" Valid routes include: {'; '.join(suggestions)}." if suggestions else ""
+            return f"No TogoID relation between '{source}' and '{target}' in route '{route}'.{hint}"
+    return None
+
+
+# Compiled ID patterns from /config/dataset: dataset -> regex
+_id_matcher: dict = {"datasets": None, "patterns": {}}
+# Number of IDs sampled when detecting the dataset of a batch
+DETECT_SAMPLE_SIZE = 200
+# Per-ID conversion results: (route, source ID) -> list of target IDs
+_convert_memo = TTLCache("togoid_convert", maxsize=200000, ttl=86400.0)
+
+# Offline conversion tables built with `togo-mcp-build togoid-table`
+TABLE_DIR = CACHE_DIR + "/togoid_tables"
+# route -> (file mtime, IdTable)
+_local_tables: dict = {}
+
+
+def _table_path(route: str) -> str:
+    return os.path.join(TABLE_DIR, route.replace(",", "__") + ".idtable")
+
+
+def _get_local_table(route: str) -> Optional[IdTable]:
+    """Return the offline table for `route`, reopening it if the file was rebuilt."""
+    path = _table_path(route)
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        _local_tables.pop(route, None)
+        return None
+    cached = _local_tables.get(route)
+    if cached is None or cached[0] != mtime:
+        try:
+            cached = (mtime, IdTable(path))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not open TogoID table {path}: {e}")
+            return None
+        _local_tables[route] = cached
+    return cached[1]
+
+
+async def export_route_pairs(route: str, ids: List[str]) -> List[Tuple[str, str]]:
+    """Convert `ids` along `route` through the API and return all (source, target) pairs."""
+    chunks = _chunk_ids(list(dict.fromkeys(ids)))
+    pages = await asyncio.gather(
+        *(_convert_all_pages(chunk, route, report="pair") for chunk in chunks)
+    )
+    return [(str(pair[0]), str(pair[-1])) for page in pages for pair in page]
+
+
+def build_route_table(route: str, pairs: Iterable[Tuple[str, str]]) -> str:
+    """Write an offline conversion table for `route` and return its path."""
+    os.makedirs(TABLE_DIR, exist_ok=True)
+    path = _table_path(route)
+    count = write_table(path, pairs)
+    logger.info(f"Wrote TogoID table for {route}: {count} source IDs -> {path}")
+    return path
+
+# TogoID regexes use the JavaScript/Ruby named-group syntax (?<name>...).
+_NAMED_GROUP = re.compile(r"\(\?<(?=[A-Za-z_])")
+
+
+def _compile_id_patterns(datasets: dict) -> Dict[str, re.Pattern]:
+    """Compile the `regex` of every dataset; datasets without a usable regex are skipped."""
+    patterns = {}
+    for name, config in datasets.items():
+        regex = config.get("regex") if isinstance(config, dict) else None
+        if not regex:
+            continue
+        try:
+            patterns[name] = re.compile(_NAMED_GROUP.sub("(?P<", regex))
+        except re.error as e:
+            logger.warning(f"Skipping TogoID regex for {name}: {e}")
+    return patterns
+
+
+async def _get_id_patterns() -> Dict[str, re.Pattern]:
+    """Return compiled ID patterns, recompiling when the dataset document changes."""
+    datasets = await _get_config("/config/dataset")
+    if _id_matcher["datasets"] is not datasets:
+        _id_matcher["patterns"] = _compile_id_patterns(datasets)
+        _id_matcher["datasets"] = datasets
+    return _id_matcher["patterns"]
+
+
+async def _get_id_pattern(dataset: str) -> Optional[re.Pattern]:
+    """Return the compiled ID pattern of `dataset`, or None if unavailable."""
+    try:
+        patterns = await _get_id_patterns()
+    except httpx.HTTPError:
+        return None
+    return patterns.get(dataset)
+
+
+def _partition_ids(pattern: Optional[re.Pattern], ids: List[str]):
+    """Split `ids` into those matching `pattern` and the rest.
+
+    All IDs are accepted when there is no pattern.
+    """
+    if pattern is None:
+        return ids, []
+    valid, invalid = [], []
+    for i in ids:
+        (valid if pattern.match(i) else invalid).append(i)
+    return valid, invalid
+
+
+def _id_key(pattern: Optional[re.Pattern], i: str) -> str:
+    """Return the bare ID the API reports for `i` (the regex `id` group, if any)."""
+    m = pattern.match(i) if pattern is not None else None
+    return (m.groupdict().get("id") if m else None) or i
+
+
+def _split_ids(ids: str) -> List[str]:
+    """Split a comma-separated ID string, dropping blanks and duplicates (order kept)."""
+    return list(dict.fromkeys(i.strip() for i in ids.split(",") if i.strip()))
+
+
+def _chunk_ids(ids: List[str], max_length: int = MAX_IDS_PARAM_LENGTH) -> List[str]:
+    """Group IDs into comma-separated chunks of at most `max_length` characters."""
+    chunks = []
+    current = []
+    length = 0
+    for i in ids:
+        if current and length + len(i) + 1 > max_length:
+            chunks.append(",".join(current))
+            current = []
+            length = 0
+        current.append(i)
+        length += len(i) + 1
+    if current:
+        chunks.append(",".join(current))
+    return chunks
+
+
+def _chunk_error(chunk: str, error: Exception) -> dict:
+    """Describe a failed chunk without echoing all of its IDs."""
+    chunk_ids = chunk.split(",")
+    return {
+        "ids": len(chunk_ids),
+        "first_id": chunk_ids[0],
+        "last_id": chunk_ids[-1],
+        "error": str(error),
+    }
+
+
+async def _convert_page(
+    ids: str,
+    route: str,
+    limit: int,
+    offset: int,
+    report: str = "target",
+) -> list:
+    """Fetch one page of /convert results."""
+    params = {
+        "ids": ids,
+        "route": route,
+        "report": report,
+        "format": "json",
+        "limit": limit,
+        "offset": offset,
+        "noheader": "0"
+    }
+    async with _semaphore:
+        response = await get_client(TOGOID_API).get(f"{TOGOID_API}/convert", params=params)
+    response.raise_for_status()
+    return response.json().get("results") or []
+
+
+async def _convert_all_pages(
+    ids: str,
+    route: str,
+    offset: int = 0,
+    report: str = "target",
+) -> list:
+    """Fetch all /convert results from `offset` on.
+
+    The first page is fetched alone; if it is full, further pages are
+    requested TOGOID_MAX_CONCURRENCY at a time. Paging stops at the first
+    page shorter than CONVERT_PAGE_SIZE.
+    """
+    results = await _convert_page(ids, route, CONVERT_PAGE_SIZE, offset, report)
+    if len(results) < CONVERT_PAGE_SIZE:
+        return results
+    offset += CONVERT_PAGE_SIZE
+    while True:
+        offsets = [offset + i * CONVERT_PAGE_SIZE for i in range(TOGOID_MAX_CONCURRENCY)]
+        pages = await asyncio.gather(
+            *(_convert_page(ids, route, CONVERT_PAGE_SIZE, o, report) for o in offsets)
+        )
+        for page in pages:
+            results.extend(page)
+            if len(page) < CONVERT_PAGE_SIZE:
+                return results
+        offset = offsets[-1] + CONVERT_PAGE_SIZE
+
+
+def _render_rows(rows: list, report: str, format: str) -> dict:
+    """Render result rows (targets, or (source, target) pairs) for output."""
+    if report == "pair":
+        if format == "tsv":
+            return {"results": "".join(f"{source}\t{target}\n" for source, target in rows)}
+        return {
+            "source": [source for source, _ in rows],
+            "target": [target for _, target in rows],
+        }
+    if format == "tsv":
+        return {"results": "".join(f"{target}\n" for target in rows)}
+    return {"results": rows}
+
+
+def _store_result(route: str, rows: list, report: str, format: str) -> dict:
+    """Store a large result and return a handle with a preview."""
+    handle = uuid.uuid4().hex
+    _result_store.set(handle, {"route": route, "rows": rows, "report": report, "format": format})
+    return {
+        "route": route,
+        "total": len(rows),
+        "handle": handle,
+        **_render_rows(rows[:100], report, format),
+        "note": f"Result too large to inline ({len(rows)} rows). "
+                "The first 100 rows are shown; use getConvertResult(handle, offset, limit) for the rest.",
+    }
+
+
+def _window_filled(ids: List[str], targets_by_id: dict, report: str, need: int) -> bool:
+    """Return True if the IDs converted so far yield `need` distinct rows in input order."""
+    rows = set()
+    for i in ids:
+        targets = targets_by_id.get(i)
+        if targets is None:
+            return False
+        for target in targets:
+            rows.add((i, target) if report == "pair" else target)
+            if len(rows) >= need:
+                return True
+    return False
+
+
 @togoid_mcp.tool()
 async def convertId(
     ids: str,
     route: str,
     limit: int = 10000,
     offset: int = 0,
-) -> list:
+    all_pages: bool = False,
+    report: str = "target",
+    format: str = "json",
+) -> dict:
     """Convert IDs from one database to another.
     
+    Routes with an offline table (built with `togo-mcp-build togoid-table`)
+    are answered locally for the IDs in the table. Other conversions are
+    cached per (route, source ID), so only IDs not seen recently are sent
+    to the API. Long ID lists are split into chunks that are converted
+    concurrently; duplicate IDs are dropped and results keep the input
+    order. Unless all_pages is set, only the chunks needed to fill
+    offset + limit rows are converted. IDs that do not match the source
+    dataset's ID format are not sent and are listed under invalid_ids.
+    
     Args:
-        ids: Comma-separated list of source IDs
-        route: Comma-separated list of datasets (source to target)
-        limit: Maximum number of results (max 10000)
+        ids: Comma-separated list of source IDs (any number)
+        route: Comma-separated list of datasets (source to target).
+            Checked locally before any request; use planRoute to find one.
+        limit: Maximum number of results
         offset: Pagination offset
+        all_pages: If True, ignore `limit` and return every result from
+            `offset` on. Results larger than 20000 rows are returned as a
+            handle for getConvertResult.
+        report: "target" for the list of target IDs, or "pair" for
+            source -> target pairs (one row per pair)
+        format: "json", or "tsv" for a single tab-separated text block
+            (compact for large batches, e.g. SPARQL VALUES blocks)
     
     Returns:
-        Dictionary with ids, route, and result arrays
+        Dictionary with route and:
+        - report="target": results (list of target IDs)
+        - report="pair": source and target (two parallel lists)
+        - format="tsv": results (TSV text; "source<TAB>target" lines for pairs)
+        Large all_pages results also contain total and handle; chunks that
+        failed are listed under errors, malformed IDs under invalid_ids.
     """
     toolcall_log("convertId")
-    params = {
-        "ids": ids,
-        "route": route,
-        "report": "target",
-        "format": "json",
-        "limit": limit,
+    if report not in ("target", "pair"):
+        raise ValueError(f"Unsupported report '{report}'. Use 'target' or 'pair'.")
+    if format not in ("json", "tsv"):
+        raise ValueError(f"Unsupported format '{format}'. Use 'json' or 'tsv'.")
+    route_error = await _check_route(route)
+    if route_error:
+        raise ValueError(route_error)
+    source = route.split(",")[0].strip()
+    pattern = await _get_id_pattern(source)
+    valid, invalid = _partition_ids(pattern, _split_ids(ids))
+    if invalid and not valid:
+        raise ValueError(f"None of the IDs match the ID format of '{source}'. Use detectDataset to find their dataset.")
+
+    route = ",".join(d.strip() for d in route.split(","))
+    table = _get_local_table(route)
+    targets_by_id = {}
+    uncached = []
+    for i in valid:
+        if table is not None:
+            targets = table.get(_id_key(pattern, i))
+            if targets is not None:
+                targets_by_id[i] = targets
+                continue
+        targets = _convert_memo.get((route, i))
+        if targets is None:
+            uncached.append(i)
+        else:
+            targets_by_id[i] = targets
+
+    chunks = _chunk_ids(uncached)
+    # Without all_pages, chunks are converted in input order, a few at a time,
+    # until the rows up to offset + limit are known.
+    need = None if all_pages else offset + limit
+    batch_size = len(chunks) if need is None else TOGOID_MAX_CONCURRENCY
+    errors = []
+    if need is not None and _window_filled(valid, targets_by_id, report, need):
+        # Offline tables and memoized IDs already cover the requested rows
+        chunks = []
+    for start in range(0, len(chunks), batch_size or 1):
+        batch = chunks[start:start + batch_size]
+        pages = await asyncio.gather(
+            *(_convert_all_pages(chunk, route, report="pair") for chunk in batch),
+            return_exceptions=True
+        )
+        for chunk, page in zip(batch, pages):
+            if isinstance(page, Exception):
+                errors.append(_chunk_error(chunk, page))
+                targets_by_id.update((i, []) for i in chunk.split(","))
+                continue
+            found = {}
+            for pair in page:
+                found.setdefault(pair[0], []).append(pair[-1])
+            for i in chunk.split(","):
+                targets = found.get(i) or found.get(_id_key(pattern, i)) or []
+                _convert_memo.set((route, i), targets)
+                targets_by_id[i] = targets
+        if need is not None and _window_filled(valid, targets_by_id, report, need):
+            break
+
+    if report == "pair":
+        rows = list(dict.fromkeys((i, t) for i in valid for t in targets_by_id.get(i, ())))
+    else:
+        rows = list(dict.fromkeys(t for i in valid for t in targets_by_id.get(i, ())))
+    rows = rows[offset:]
+    if not all_pages:
+        rows = rows[:limit]
+
+    if all_pages and len(rows) > INLINE_RESULT_LIMIT:
+        output = _store_result(route, rows, report, format)
+    else:
+        output = {"route": route, **_render_rows(rows, report, format)}
+    if errors:
+        output["errors"] = errors
+    if invalid:
+        output["invalid_ids"] = invalid
+    return output
+
+
+@togoid_mcp.tool()
+async def getConvertResult(
+    handle: str,
+    offset: int = 0,
+    limit: int = 10000,
+) -> dict:
+    """Read a slice of a large convertId result by its handle.
+    
+    Args:
+        handle: Handle returned by convertId(all_pages=True)
+        offset: Index of the first row to return
+        limit: Maximum number of rows to return
+    
+    Returns:
+        Dictionary with route, total, offset and the rows in the report and
+        format requested from convertId
+    """
+    toolcall_log("getConvertResult")
+    stored = _result_store.get(handle)
+    if stored is None:
+        raise ValueError(f"Unknown or expired result handle: {handle}")
+    rows = stored["rows"]
+    return {
+        "route": stored["route"],
+        "total": len(rows),
         "offset": offset,
-        "noheader": "0"
+        **_render_rows(rows[offset:offset + limit], stored["report"], stored["format"]),
     }
-    
-    response = await _client.get("/convert", params=params)
-    response.raise_for_status()
-    return response.json() .get("results")
 
 
 @togoid_mcp.tool()
@@ -46,22 +601,153 @@ async def countId(
 ) -> dict:
     """Count how many IDs can be converted between databases.
     
+    Long ID lists are split into chunks that are counted concurrently and
+    summed. When chunked, the target count may include targets shared by
+    IDs in different chunks more than once.
+    
     Args:
         source: Source database key
         target: Target database key
-        ids: Comma-separated list of IDs
+        ids: Comma-separated list of IDs (any number)
     
     Returns:
-        Dictionary with source and target counts
+        Dictionary with source and target counts (plus errors for failed
+        chunks and invalid_ids for IDs that do not match the source format)
     """
     toolcall_log("countId")
-    response = await _client.get(
-        f"/count/{source}-{target}",
-        params={"ids": ids}
+    route_error = await _check_route(f"{source},{target}")
+    if route_error:
+        raise ValueError(route_error)
+    valid, invalid = _partition_ids(await _get_id_pattern(source), _split_ids(ids))
+    if invalid and not valid:
+        raise ValueError(f"None of the IDs match the ID format of '{source}'. Use detectDataset to find their dataset.")
+    chunks = _chunk_ids(valid)
+    if len(chunks) <= 1:
+        total = await _count_chunk(source, target, chunks[0] if chunks else "")
+        if invalid:
+            total["invalid_ids"] = invalid
+        return total
+
+    counts = await asyncio.gather(
+        *(_count_chunk(source, target, chunk) for chunk in chunks),
+        return_exceptions=True
     )
+    total = {}
+    errors = []
+    for chunk, count in zip(chunks, counts):
+        if isinstance(count, Exception):
+            errors.append(_chunk_error(chunk, count))
+            continue
+        for key, value in count.items():
+            if isinstance(value, int):
+                total[key] = total.get(key, 0) + value
+            else:
+                total.setdefault(key, value)
+    if errors:
+        total["errors"] = errors
+    if invalid:
+        total["invalid_ids"] = invalid
+    return total
+
+
+async def _count_chunk(source: str, target: str, ids: str) -> dict:
+    """Run /count for one chunk of IDs."""
+    async with _semaphore:
+        response = await get_client(TOGOID_API).get(
+            f"{TOGOID_API}/count/{source}-{target}",
+            params={"ids": ids}
+        )
     response.raise_for_status()
     return response.json()
 
+@togoid_mcp.tool()
+async def planRoute(
+    source: str,
+    target: str,
+    max_hops: int = 3,
+    max_routes: int = 10,
+) -> dict:
+    """Find conversion routes between two datasets for convertId.
+    
+    Planned locally from the cached relation configuration; no conversion
+    request is sent.
+    
+    Args:
+        source: Source dataset key (e.g., 'uniprot')
+        target: Target dataset key (e.g., 'ensembl_gene')
+        max_hops: Maximum number of conversion steps (default: 3)
+        max_routes: Maximum number of routes to return (default: 10)
+    
+    Returns:
+        Dictionary with source, target and routes. Each route has the
+        route string for convertId, its hop count, and reverse_hops (steps
+        that use a relation against its defined direction). Routes are
+        ordered by hops, then reverse_hops.
+    """
+    toolcall_log("planRoute")
+    graph = await _get_relation_graph()
+    unknown = [d for d in (source, target) if d not in graph]
+    if unknown:
+        raise ValueError(f"Unknown dataset(s): {', '.join(unknown)}. Use getAllDataset to list datasets.")
+    return {
+        "source": source,
+        "target": target,
+        "routes": _plan_routes(graph, source, target, max_hops, max_routes),
+    }
+
+@togoid_mcp.tool()
+async def detectDataset(ids: str, max_candidates: int = 5) -> dict:
+    """Guess which dataset a batch of IDs belongs to from the dataset ID formats.
+    
+    Checked locally against the `regex` of every dataset; nothing is sent
+    to the conversion API. Large batches are ranked on an evenly spaced
+    sample of 200 IDs, then every ID is checked against the best match.
+    
+    Args:
+        ids: Comma-separated list of IDs
+        max_candidates: Maximum number of candidate datasets to return
+    
+    Returns:
+        Dictionary with:
+        - candidates: datasets ranked by the fraction of sampled IDs they match
+        - dataset: the best candidate (None if no dataset matches)
+        - ambiguous: True if several datasets match as many IDs as the best
+          (listed in tied_datasets)
+        - unmatched_ids: IDs that do not match the best candidate
+    """
+    toolcall_log("detectDataset")
+    patterns = await _get_id_patterns()
+    id_list = _split_ids(ids)
+    step = max(1, len(id_list) // DETECT_SAMPLE_SIZE)
+    sample = id_list[::step][:DETECT_SAMPLE_SIZE]
+
+    candidates = []
+    for name, pattern in patterns.items():
+        matched = sum(1 for i in sample if pattern.match(i))
+        if matched:
+            candidates.append((matched, name))
+    candidates.sort(key=lambda c: (-c[0], c[1]))
+    if not candidates:
+        return {"candidates": [], "dataset": None, "ambiguous": False, "unmatched_ids": id_list}
+
+    best_count, best = candidates[0]
+    tied = [name for matched, name in candidates if matched == best_count]
+    datasets = await _get_config("/config/dataset")
+    return {
+        "candidates": [
+            {
+                "dataset": name,
+                "label": datasets.get(name, {}).get("label"),
+                "fraction": round(matched / len(sample), 3),
+            }
+            for matched, name in candidates[:max_candidates]
+        ],
+        "dataset": best,
+        "ambiguous": len(tied) > 1,
+        "tied_datasets": tied if len(tied) > 1 else [],
+        "unmatched_ids": [i for i in id_list if not patterns[best].match(i)],
+    }
+
 @togoid_mcp.tool()
 async def getAllDataset() -> dict:
     """Get configuration for all available datasets.
@@ -71,9 +757,7 @@ async def getAllDataset() -> dict:
         including labels, regex patterns, prefixes, examples, etc.
     """
     toolcall_log("getAllDataset")
-    response = await _client.get("/config/dataset")
-    response.raise_for_status()
-    return response.json()
+    return await _get_config("/config/dataset")
 
 @togoid_mcp.tool()
 async def getDataset(dataset: str) -> dict:
@@ -91,9 +775,10 @@ async def getDataset(dataset: str) -> dict:
         - annotations: Available annotation types
     """
     toolcall_log("getDataset")
-    response = await _client.get(f"/config/dataset/{dataset}")
-    response.raise_for_status()
-    return response.json()
+    datasets = await _get_config("/config/dataset")
+    if dataset in datasets:
+        return datasets[dataset]
+    return await _get_config(f"/config/dataset/{dataset}")
 
 @togoid_mcp.tool()
 async def getAllRelation() -> dict:
@@ -103,9 +788,7 @@ async def getAllRelation() -> dict:
         Dictionary mapping database pairs to their relationships
     """
     toolcall_log("getAllRelation")
-    response = await _client.get("/config/relation")
-    response.raise_for_status()
-    return response.json()
+    return await _get_config("/config/relation")
 
 @togoid_mcp.tool()
 async def getRelation(source: str, target: str) -> list:
@@ -119,9 +802,11 @@ async def getRelation(source: str, target: str) -> list:
         List of relationship objects with forward, reverse, and description
     """
     toolcall_log("getRelation")
-    response = await _client.get(f"/config/relation/{source}-{target}")
-    response.raise_for_status()
-    return response.json()
+    relations = await _get_config("/config/relation")
+    key = f"{source}-{target}"
+    if key in relations:
+        return relations[key]
+    return await _get_config(f"/config/relation/{key}")
 
 @togoid_mcp.tool()
 async def getDescription() -> dict:
@@ -132,6 +817,4 @@ async def getDescription() -> dict:
         names, and organization info for each database
     """
     toolcall_log("getDescription")
-    response = await _client.get("/config/descriptions")
-    response.raise_for_status()
-    return response.json()
+    return await _get_config("/config/descriptions")
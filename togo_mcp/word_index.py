@@ -0,0 +1,56 @@
+"""
+Word matching shared by the label and ontology term indexes.
+
+Both indexes keep a sorted vocabulary of normalized words with a posting
+list per word. A query matches every word in full except the last, which
+also matches as a prefix; `prefix_expansions` picks the vocabulary words
+it expands to and `ranked_unique` orders the matches.
+"""
+
+import heapq
+import re
+from typing import Callable, Hashable, Iterable, List
+
+_WORD = re.compile(r"\w+")
+# The last query word matches as a prefix of at most this many vocabulary words
+PREFIX_EXPANSION = 50
+
+
+def words(text: str) -> List[str]:
+    return _WORD.findall(text.casefold())
+
+
+def prefix_expansions(start: int, stop: int, posting_size: Callable[[int], int], exact: bool) -> List[int]:
+    """Return the vocabulary words (by position) a prefix expands to.
+
+    `start`..`stop` are the positions of all words starting with the prefix,
+    and `exact` tells whether the word at `start` is the prefix itself. That
+    word is always kept; the rest are the PREFIX_EXPANSION words with the
+    most postings, so common completions ("protein" for "prot") are not
+    crowded out by rarer words that sort before them.
+    """
+    return heapq.nlargest(PREFIX_EXPANSION, range(start, stop), key=lambda w: (exact and w == start, posting_size(w)))
+
+
+def ranked_unique(matches: Iterable[int], rank: Callable, key: Callable[[int], Hashable],
+                  limit: int, overfetch: int) -> List[int]:
+    """Return up to `limit` matches in `rank` order, one per `key`.
+
+    Only the best `overfetch * limit` matches are sorted, unless duplicate
+    keys among them leave too few results.
+    """
+    matches = list(matches)
+    ranked = heapq.nsmallest(overfetch * limit, matches, key=rank)
+    if len({key(m) for m in ranked}) < min(limit, len(matches)):
+        ranked = sorted(matches, key=rank)
+    results = []
+    seen = set()
+    for m in ranked:
+        k = key(m)
+        if k in seen:
+            continue
+        seen.add(k)
+        results.append(m)
+        if len(results) >= limit:
+            break
+    return results